@@ -0,0 +1,30 @@
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.getenv('API_PORT', 8000)}"
+workers = int(os.getenv("API_WORKERS", 0)) or multiprocessing.cpu_count()
+
+# UvicornWorker picks uvloop and httptools automatically when they are installed.
+worker_class = "uvicorn_worker.UvicornWorker"
+
+# Import the app once in the master so forked workers share it copy-on-write.
+preload_app = True
+
+# On SIGTERM, workers stop accepting connections and get this long to finish
+# in-flight requests and run the lifespan shutdown.
+graceful_timeout = int(os.getenv("API_GRACEFUL_TIMEOUT", 30))
+timeout = int(os.getenv("API_WORKER_TIMEOUT", 60))
+keepalive = 5
+
+accesslog = "-"
+
+# Every worker starts its own crypto process pool, so split the cores between them.
+os.environ.setdefault(
+    "CRYPTO_WORKERS", str(max(multiprocessing.cpu_count() // workers, 1))
+)
+
+
+def on_starting(server):
+    from api.data.context import preload_context
+
+    preload_context()
@@ -2,6 +2,7 @@ import base64
 import hashlib
 import os
 from contextlib import asynccontextmanager
+from functools import lru_cache
 from typing import Annotated
 from typing import Any
 
@@ -18,15 +19,43 @@ from fastapi import status
 from fastapi.security import OAuth2PasswordBearer
 from pydantic import BaseModel
 from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.sql import bindparam
 from sqlalchemy.sql import select
 
+import api.config as config
+from api.cache import TTLCache
 from api.data.schemas import SessionSchema
 from api.data.schemas import UserDataKeySchema
 from api.data.schemas import UserKeySchema
+from api.envelope import pack
+from api.envelope import unpack
+from api.keypool import generate_rsa_key_pair
+from api.keypool import key_pool
+from api.session_cache import get_session_validity
+from api.session_cache import set_session_validity
 from api.utils import AsyncSessionLocal
+from api.utils import engine
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="session/authorize")
 
+auth_cache = TTLCache(maxsize=config.AUTH_CACHE_SIZE, ttl=config.AUTH_CACHE_TTL)
+key_cache = TTLCache(
+    maxsize=config.KEY_CACHE_SIZE, ttl=config.KEY_CACHE_IDLE_TTL, sliding=True
+)
+
+resolve_auth_stmt = (
+    select(
+        UserKeySchema.public_key,
+        UserKeySchema.private_key,
+        UserDataKeySchema.data_key,
+        SessionSchema.id.is_not(None).label("is_valid_session"),
+    )
+    .select_from(UserKeySchema)
+    .outerjoin(SessionSchema, SessionSchema.id == bindparam("session_id"))
+    .outerjoin(UserDataKeySchema, UserDataKeySchema.id == bindparam("data_key_id"))
+    .where(UserKeySchema.id == bindparam("user_key"))
+)
+
 
 @asynccontextmanager
 async def database_session():
@@ -42,6 +71,7 @@ class Token(BaseModel):
 class AuthPayload(BaseModel):
     data_key: str
     user_key: str
+    session_id: str
 
 
 class NotAuthorizedError(Exception):
@@ -68,40 +98,82 @@ async def authenticate_request(token: Annotated[str, Depends(oauth2_scheme)]):
     session_id, user_id = session_key.split(":")
     public_key = enc_public_key.encode("utf-8")
 
-    key_handler = await UserKeyHandler.load_keys(user_id)
-    if not await key_handler.is_valid_session(session_id):
+    cache_key = (session_id, public_key)
+    cached_auth = auth_cache.get(cache_key)
+    session_validity = await get_session_validity(session_id)
+
+    if session_validity is False:
+        invalidate_session(session_id)
+        raise cred_exception
+
+    if cached_auth:
+        return cached_auth
+
+    key_handler = UserKeyHandler(user_id)
+    if not await key_handler.resolve_session(session_id, public_key):
         raise cred_exception
 
     payload["data_key"] = await key_handler.get_or_create_data_key(public_key)
     payload["user_key"] = key_handler.hashed_user_id
-    return AuthPayload(**payload)
+    payload["session_id"] = session_id
+
+    auth = AuthPayload(**payload)
+    auth_cache.set(cache_key, auth)
+    return auth
+
+
+def invalidate_session(session_id: str) -> int:
+    return auth_cache.evict(lambda key: key[0] == session_id)
+
+
+@lru_cache(maxsize=config.CIPHER_CACHE_SIZE)
+def get_cipher(data_key: bytes | str) -> Fernet:
+    return Fernet(data_key)
 
 
 def encrypt_user_data(data_key: bytes, data: Any) -> bytes:
-    f = Fernet(data_key)
-    return f.encrypt(data.encode("utf-8"))
+    f = get_cipher(data_key)
+    return f.encrypt(pack(data.encode("utf-8")))
 
 
 def decrypt_user_data(data_key: bytes, encrypted_data: bytes) -> Any:
     try:
-        f = Fernet(data_key)
-        return f.decrypt(encrypted_data).decode("utf-8")
+        f = get_cipher(data_key)
+        return unpack(f.decrypt(encrypted_data)).decode("utf-8")
     except Exception as e:
         raise NotAuthorizedError from e
 
 
-class UserKeyHandler:
-    @classmethod
-    async def load_keys(cls, user_id: str) -> "UserKeyHandler":
-        key_handler = cls(user_id)
-        await key_handler.get_public_key()
-        await key_handler.get_private_key()
-        return key_handler
+def bulk_encrypt(data_key: bytes, data: list[Any]) -> list[bytes]:
+    f = get_cipher(data_key)
+    return [f.encrypt(pack(d.encode("utf-8"))) for d in data]
+
+
+def bulk_decrypt(
+    data_key: bytes, encrypted_data: list[bytes]
+) -> tuple[list[Any], list[int]]:
+    try:
+        f = get_cipher(data_key)
+    except Exception as e:
+        raise NotAuthorizedError from e
 
+    decrypted = []
+    failed = []
+    for i, token in enumerate(encrypted_data):
+        try:
+            decrypted.append(unpack(f.decrypt(token)).decode("utf-8"))
+        except Exception:
+            decrypted.append(None)
+            failed.append(i)
+    return decrypted, failed
+
+
+class UserKeyHandler:
     def __init__(self, user_id: str):
         self.user_id = user_id
         self.public_key = None
         self.private_key = None
+        self.wrapped_data_key = None
 
     @property
     def hashed_user_id(self) -> str:
@@ -109,16 +181,50 @@ class UserKeyHandler:
 
     @property
     def data_key_id(self) -> str:
-        key = f"{self.hashed_user_id}:{self.public_key.decode('utf-8')}"
+        return self._data_key_id(self.public_key)
+
+    def _data_key_id(self, public_key: bytes) -> str:
+        key = f"{self.hashed_user_id}:{public_key.decode('utf-8')}"
         return base64.urlsafe_b64encode(key.encode("utf-8")).decode("utf-8")
 
+    async def resolve_session(self, session_id: str, public_key: bytes) -> bool:
+        async with engine.connect() as conn:
+            query = await conn.execute(
+                resolve_auth_stmt,
+                {
+                    "session_id": session_id,
+                    "data_key_id": self._data_key_id(public_key),
+                    "user_key": self.hashed_user_id,
+                },
+            )
+            result = query.one_or_none()
+
+        if result:
+            await set_session_validity(session_id, result.is_valid_session)
+
+        if not result or not result.is_valid_session:
+            return False
+
+        if result.public_key != public_key:
+            return False
+
+        self.public_key = result.public_key
+        self.private_key = result.private_key
+        self.wrapped_data_key = result.data_key
+        return True
+
     async def is_valid_session(self, session_id: str) -> bool:
+        cached = await get_session_validity(session_id)
+        if cached is not None:
+            return cached
+
         async with database_session() as db:
             query = await db.execute(
-                select(SessionSchema).filter(SessionSchema.id == session_id)
+                select(SessionSchema.id).filter(SessionSchema.id == session_id)
             )
             results = query.scalar_one_or_none()
 
+        await set_session_validity(session_id, results is not None)
         if not results:
             return False
 
@@ -136,7 +242,22 @@ class UserKeyHandler:
 
         return Token(access_token=encoded_jwt, token_type="bearer")
 
+    @staticmethod
+    def purge_key_cache(user_id: str | None = None) -> int:
+        if user_id is None:
+            purged = len(key_cache)
+            key_cache.clear()
+            return purged
+
+        hashed_user_id = hashlib.sha256(user_id.encode("utf-8")).hexdigest()
+        return key_cache.evict(lambda key: key[1] == hashed_user_id)
+
     def _private_key_encryption(self) -> Fernet:
+        cache_key = ("wrapping_key", self.hashed_user_id)
+        f = key_cache.get(cache_key)
+        if f:
+            return f
+
         kdf = PBKDF2HMAC(
             algorithm=hashes.SHA256(),
             length=32,
@@ -144,24 +265,26 @@ class UserKeyHandler:
             iterations=100000,
         )
         key = base64.urlsafe_b64encode(kdf.derive(self.user_id.encode("utf-8")))
-        return Fernet(key)
+        f = Fernet(key)
+        key_cache.set(cache_key, f)
+        return f
 
-    async def get_public_key(self) -> bytes:
-        async with database_session() as db:
-            query = await db.execute(
-                select(UserKeySchema).filter(
-                    UserKeySchema.id == self.hashed_user_id,
-                )
-            )
-            results = query.scalar_one_or_none()
+    def _load_private_key(self) -> rsa.RSAPrivateKey:
+        cache_key = ("private_key", self.hashed_user_id, self.private_key)
+        private_key = key_cache.get(cache_key)
+        if private_key:
+            return private_key
 
-            if not results:
-                return None
+        f = self._private_key_encryption()
+        decrypted_private_key = f.decrypt(self.private_key)
 
-            self.public_key = results.public_key
-            return results.public_key
+        private_key = serialization.load_pem_private_key(
+            decrypted_private_key, password=None
+        )
+        key_cache.set(cache_key, private_key)
+        return private_key
 
-    async def get_private_key(self) -> bytes:
+    async def get_public_key(self) -> bytes:
         async with database_session() as db:
             query = await db.execute(
                 select(UserKeySchema).filter(
@@ -173,23 +296,14 @@ class UserKeyHandler:
             if not results:
                 return None
 
-            self.private_key = results.private_key
-            return results.private_key
+            self.public_key = results.public_key
+            return results.public_key
 
     async def generate_rsa_keys(self) -> bytes:
-        key = rsa.generate_private_key(
-            public_exponent=65537,
-            key_size=2048,
-        )
-        private_key = key.private_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PrivateFormat.PKCS8,
-            encryption_algorithm=serialization.NoEncryption(),
-        )
-        public_key = key.public_key().public_bytes(
-            encoding=serialization.Encoding.PEM,
-            format=serialization.PublicFormat.SubjectPublicKeyInfo,
-        )
+        key_pair = key_pool.get()
+        if not key_pair:
+            key_pair = generate_rsa_key_pair()
+        private_key, public_key = key_pair
 
         f = self._private_key_encryption()
         encrypted_private_key = f.encrypt(private_key)
@@ -228,13 +342,7 @@ class UserKeyHandler:
         if not self.private_key:
             raise ValueError("Private key not found.")
 
-        f = self._private_key_encryption()
-        decrypted_private_key = f.decrypt(self.private_key)
-
-        private_key = serialization.load_pem_private_key(
-            decrypted_private_key, password=None
-        )
-
+        private_key = self._load_private_key()
         decrypted = private_key.decrypt(
             data,
             padding.OAEP(
@@ -252,6 +360,9 @@ class UserKeyHandler:
         if not self.private_key:
             raise ValueError("Private key not found.")
 
+        if self.wrapped_data_key:
+            return self.decrypt_data(self.wrapped_data_key)
+
         async with database_session() as db:
             query = await db.execute(
                 select(UserDataKeySchema).filter(
@@ -1,8 +1,57 @@
 import os
 
+POSTGRES_HOST = os.getenv("POSTGRES_HOST", "postgres")
 POSTGRES_URL = (
-    f"{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}@postgres:5432/terra"
+    f"{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+    f"@{POSTGRES_HOST}:5432/terra"
 )
+REDIS_HOST = os.getenv("REDIS_HOST", "redis")
 
 EMBED_DIM = 1536
-EMBED_MODEL = "text-embedding-3-small"
+# Setting this to "hashed-ngram" swaps in a local embedder for offline benchmarks.
+EMBED_MODEL = os.getenv("EMBED_MODEL", "text-embedding-3-small")
+
+CONTEXT_SCHEMA = os.getenv("CONTEXT_SCHEMA", "context")
+# Redis keys for query embeddings and search results. Follows the schema, so a
+# benchmark schema never shares caches with the live one.
+CONTEXT_CACHE_PREFIX = os.getenv("CONTEXT_CACHE_PREFIX", f"api:{CONTEXT_SCHEMA}")
+
+AUTH_CACHE_SIZE = int(os.getenv("AUTH_CACHE_SIZE", 1024))
+AUTH_CACHE_TTL = int(os.getenv("AUTH_CACHE_TTL", 300))
+
+KEY_CACHE_SIZE = int(os.getenv("KEY_CACHE_SIZE", 256))
+KEY_CACHE_IDLE_TTL = int(os.getenv("KEY_CACHE_IDLE_TTL", 0)) or None
+
+SESSION_CACHE_TTL = int(os.getenv("SESSION_CACHE_TTL", 60))
+SESSION_CACHE_NEGATIVE_TTL = int(os.getenv("SESSION_CACHE_NEGATIVE_TTL", 10))
+
+CIPHER_CACHE_SIZE = int(os.getenv("CIPHER_CACHE_SIZE", 256))
+
+KEY_POOL_SIZE = int(os.getenv("KEY_POOL_SIZE", 4))
+
+CRYPTO_WORKERS = int(os.getenv("CRYPTO_WORKERS", 0)) or None
+CRYPTO_CHUNK_SIZE = int(os.getenv("CRYPTO_CHUNK_SIZE", 200))
+
+COMPRESSION_THRESHOLD = int(os.getenv("COMPRESSION_THRESHOLD", 256))
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", 3))
+
+ARCHIVE_IDLE_DAYS = int(os.getenv("ARCHIVE_IDLE_DAYS", 90))
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", 100))
+
+EMBED_BATCH_SIZE = int(os.getenv("EMBED_BATCH_SIZE", 256))
+
+INGEST_STREAM_MAXLEN = int(os.getenv("INGEST_STREAM_MAXLEN", 100_000))
+INGEST_BATCH_SIZE = int(os.getenv("INGEST_BATCH_SIZE", 512))
+INGEST_BATCH_WAIT_MS = int(os.getenv("INGEST_BATCH_WAIT_MS", 2000))
+INGEST_CONCURRENCY = int(os.getenv("INGEST_CONCURRENCY", 2))
+INGEST_CLAIM_IDLE_MS = int(os.getenv("INGEST_CLAIM_IDLE_MS", 300_000))
+INGEST_MAX_ATTEMPTS = int(os.getenv("INGEST_MAX_ATTEMPTS", 5))
+
+QUERY_EMBED_CACHE_SIZE = int(os.getenv("QUERY_EMBED_CACHE_SIZE", 1024))
+QUERY_EMBED_CACHE_TTL = int(os.getenv("QUERY_EMBED_CACHE_TTL", 7 * 24 * 3600))
+SEARCH_CACHE_TTL = int(os.getenv("SEARCH_CACHE_TTL", 30))
+
+CHUNK_SINGLE_MAX_TOKENS = int(os.getenv("CHUNK_SINGLE_MAX_TOKENS", 512))
+CHUNK_SEMANTIC_MIN_TOKENS = int(os.getenv("CHUNK_SEMANTIC_MIN_TOKENS", 2048))
+CHUNK_SIZE = int(os.getenv("CHUNK_SIZE", 512))
+CHUNK_OVERLAP = int(os.getenv("CHUNK_OVERLAP", 64))
@@ -0,0 +1,120 @@
+import base64
+import hashlib
+import json
+from array import array
+
+import api.config as config
+from api.cache import TTLCache
+from api.models import ContextChunk
+from api.utils import cache
+from api.utils import logger
+from redis.exceptions import RedisError
+
+__all__ = [
+    "get_query_embedding",
+    "get_search_generation",
+    "get_search_results",
+    "invalidate_search_results",
+    "set_query_embedding",
+    "set_search_results",
+]
+
+EMBED_CACHE_PREFIX = f"{config.CONTEXT_CACHE_PREFIX}:embed"
+SEARCH_CACHE_PREFIX = f"{config.CONTEXT_CACHE_PREFIX}:search"
+SEARCH_GENERATION_KEY = f"{config.CONTEXT_CACHE_PREFIX}:generation"
+
+embedding_cache = TTLCache(maxsize=config.QUERY_EMBED_CACHE_SIZE)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.split()).casefold()
+
+
+def _query_digest(query: str) -> str:
+    return hashlib.sha256(normalize_query(query).encode("utf-8")).hexdigest()
+
+
+def _embedding_cache_key(query: str) -> str:
+    model = f"{config.EMBED_MODEL}:{config.EMBED_DIM}"
+    return f"{EMBED_CACHE_PREFIX}:{model}:{_query_digest(query)}"
+
+
+def _search_cache_key(generation: int, scope: str, query: str, top_k: int) -> str:
+    return f"{SEARCH_CACHE_PREFIX}:{generation}:{scope}:{top_k}:{_query_digest(query)}"
+
+
+async def get_query_embedding(query: str) -> list[float] | None:
+    key = _embedding_cache_key(query)
+    embedding = embedding_cache.get(key)
+    if embedding is not None:
+        return embedding
+
+    try:
+        cached = await cache.get(key)
+    except RedisError as e:
+        logger.warning(f"Embedding cache unavailable: {e}")
+        return None
+
+    if cached is None:
+        return None
+    embedding = array("f", base64.b64decode(cached)).tolist()
+    embedding_cache.set(key, embedding)
+    return embedding
+
+
+async def set_query_embedding(query: str, embedding: list[float]):
+    key = _embedding_cache_key(query)
+    embedding_cache.set(key, embedding)
+    try:
+        await cache.set(
+            key,
+            base64.b64encode(array("f", embedding).tobytes()).decode("ascii"),
+            ex=config.QUERY_EMBED_CACHE_TTL,
+        )
+    except RedisError as e:
+        logger.warning(f"Embedding cache unavailable: {e}")
+
+
+# Cached results are keyed by a generation counter that ingestion bumps, so new
+# context is visible to the next search without waiting for the TTL.
+async def get_search_generation() -> int | None:
+    try:
+        return int(await cache.get(SEARCH_GENERATION_KEY) or 0)
+    except RedisError as e:
+        logger.warning(f"Search cache unavailable: {e}")
+        return None
+
+
+async def get_search_results(
+    generation: int, scope: str, query: str, top_k: int
+) -> list[ContextChunk] | None:
+    try:
+        cached = await cache.get(_search_cache_key(generation, scope, query, top_k))
+    except RedisError as e:
+        logger.warning(f"Search cache unavailable: {e}")
+        return None
+
+    if cached is None:
+        return None
+    return [ContextChunk.model_validate(c) for c in json.loads(cached)]
+
+
+async def set_search_results(
+    generation: int, scope: str, query: str, top_k: int, results: list[ContextChunk]
+):
+    payload = json.dumps([r.model_dump(mode="json") for r in results])
+    try:
+        await cache.set(
+            _search_cache_key(generation, scope, query, top_k),
+            payload,
+            ex=config.SEARCH_CACHE_TTL,
+        )
+    except RedisError as e:
+        logger.warning(f"Search cache unavailable: {e}")
+
+
+async def invalidate_search_results():
+    try:
+        await cache.incr(SEARCH_GENERATION_KEY)
+    except RedisError as e:
+        logger.warning(f"Search cache unavailable: {e}")
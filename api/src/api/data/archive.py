@@ -0,0 +1,174 @@
+import asyncio
+import json
+import logging
+from collections import defaultdict
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+import api.config as config
+from api.data.schemas import ArchivedThreadSchema
+from api.data.schemas import MessageSchema
+from api.data.schemas import ThreadSchema
+from api.envelope import pack
+from api.envelope import unpack
+from api.utils import AsyncSessionLocal
+from api.utils import engine
+from api.utils import logger
+from api.workers import crypto_pool
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import and_
+from sqlalchemy.sql import delete
+from sqlalchemy.sql import insert
+from sqlalchemy.sql import or_
+from sqlalchemy.sql import select
+
+__all__ = ["archive_threads", "rehydrate_thread"]
+
+
+# Message contents stay encrypted with the owner's data key, so threads can be archived
+# without access to user keys. Fernet tokens are base64 of random ciphertext, so
+# compression recovers little more than the base64 overhead.
+def pack_messages(messages: list[MessageSchema]) -> bytes:
+    records = [
+        {
+            "id": m.id,
+            "role": m.role,
+            "content": m.content.decode("ascii"),
+            "timestamp": m.timestamp.isoformat(),
+            "model": m.model,
+            "encoding": m.encoding,
+        }
+        for m in messages
+    ]
+    return pack(json.dumps(records, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack_messages(thread_id: str, payload: bytes) -> list[dict]:
+    records = json.loads(unpack(payload))
+    for record in records:
+        record["thread_id"] = thread_id
+        record["content"] = record["content"].encode("ascii")
+        record["timestamp"] = datetime.fromisoformat(record["timestamp"])
+    return records
+
+
+async def _archive_batch(db: AsyncSession, cutoff: datetime, batch_size: int) -> int:
+    query = await db.execute(
+        select(ThreadSchema)
+        .filter(
+            or_(
+                ThreadSchema.is_deleted.is_(True),
+                and_(
+                    ThreadSchema.last_used < cutoff,
+                    or_(
+                        ThreadSchema.rehydrated_at.is_(None),
+                        ThreadSchema.rehydrated_at < cutoff,
+                    ),
+                ),
+            )
+        )
+        .order_by(ThreadSchema.last_used.asc())
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    threads = query.scalars().all()
+    if not threads:
+        return 0
+
+    thread_ids = [t.id for t in threads]
+    query = await db.execute(
+        select(MessageSchema)
+        .filter(MessageSchema.thread_id.in_(thread_ids))
+        .order_by(MessageSchema.timestamp.asc(), MessageSchema.id.asc())
+    )
+    messages = defaultdict(list)
+    for message in query.scalars():
+        messages[message.thread_id].append(message)
+
+    await db.execute(
+        insert(ArchivedThreadSchema),
+        [
+            {
+                "id": t.id,
+                "user_id": t.user_id,
+                "summary": t.summary,
+                "last_used": t.last_used,
+                "is_deleted": t.is_deleted,
+                "message_count": len(messages[t.id]),
+                "messages": pack_messages(messages[t.id]),
+            }
+            for t in threads
+        ],
+    )
+    await db.execute(
+        delete(MessageSchema).where(MessageSchema.thread_id.in_(thread_ids))
+    )
+    await db.execute(delete(ThreadSchema).where(ThreadSchema.id.in_(thread_ids)))
+    await db.commit()
+    return len(threads)
+
+
+async def archive_threads(
+    idle_days: int = config.ARCHIVE_IDLE_DAYS,
+    batch_size: int = config.ARCHIVE_BATCH_SIZE,
+) -> int:
+    cutoff = datetime.now(UTC) - timedelta(days=idle_days)
+    archived = 0
+    while True:
+        async with AsyncSessionLocal() as db:
+            count = await _archive_batch(db, cutoff, batch_size)
+        if not count:
+            break
+        archived += count
+        logger.info(f"Archived {archived} threads idle since {cutoff.isoformat()}.")
+    return archived
+
+
+async def rehydrate_thread(
+    db: AsyncSession, thread_id: str, user_key: str, include_deleted: bool = False
+) -> bool:
+    stmt = select(ArchivedThreadSchema).filter(
+        ArchivedThreadSchema.id == thread_id,
+        ArchivedThreadSchema.user_id == user_key,
+    )
+    if not include_deleted:
+        stmt = stmt.filter(ArchivedThreadSchema.is_deleted.is_(False))
+
+    query = await db.execute(stmt.with_for_update())
+    archived = query.scalar_one_or_none()
+    if not archived:
+        return False
+
+    messages = await crypto_pool.run(unpack_messages, archived.id, archived.messages)
+    await db.execute(
+        insert(ThreadSchema).values(
+            id=archived.id,
+            user_id=archived.user_id,
+            summary=archived.summary,
+            last_used=archived.last_used,
+            # Reading a thread is not a use, but it should not be archived again on
+            # the next run either.
+            rehydrated_at=datetime.now(UTC),
+            is_deleted=archived.is_deleted,
+        )
+    )
+    if messages:
+        await db.execute(insert(MessageSchema), messages)
+    await db.delete(archived)
+    await db.commit()
+
+    logger.info(f"Rehydrated thread {thread_id} with {len(messages)} messages.")
+    return True
+
+
+async def main():
+    try:
+        await archive_threads()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
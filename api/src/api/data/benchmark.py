@@ -0,0 +1,264 @@
+import argparse
+import asyncio
+import json
+import logging
+import random
+import statistics
+import time
+from collections.abc import Iterator
+
+import api.config as config
+from api.context_cache import invalidate_search_results
+from api.data.context import close_context
+from api.data.context import context_filters
+from api.data.context import embed_query
+from api.data.context import get_vector_store
+from api.data.context import ingest_context
+from api.data.context import search_context
+from api.data.embeddings import HASHED_EMBED_MODEL
+from api.models import ContextMessage
+from api.utils import cache
+from api.utils import engine
+from api.utils import logger
+from llama_index.core.vector_stores import VectorStoreQuery
+from sqlalchemy import text
+
+__all__ = ["run_benchmark"]
+
+VECTOR_TABLE = f"{config.CONTEXT_SCHEMA}.data_vectors"
+
+AGENTS = ["researcher", "analyst", "archivist", "editor"]
+SYLLABLES = ["ka", "lo", "mi", "ren", "tu", "sa", "vel", "or", "pin", "de", "qua", "zi"]
+
+EXACT_SEARCH = f"""
+SELECT node_id
+FROM {VECTOR_TABLE}
+WHERE metadata_->>'user_key' = :user_key
+ORDER BY embedding <=> CAST(:embedding AS vector)
+LIMIT :top_k
+"""
+
+cli = argparse.ArgumentParser(
+    description="Benchmark context ingestion and search against a local Postgres.",
+)
+cli.add_argument("--chunks", type=int, nargs="+", default=[10_000])
+cli.add_argument("--queries", type=int, default=200)
+cli.add_argument("--top-k", type=int, default=10)
+cli.add_argument("--ef-search", type=int, nargs="+", default=[20, 40, 100, 200, 400])
+cli.add_argument("--users", type=int, default=100)
+cli.add_argument("--seed", type=int, default=0)
+cli.add_argument("--output", help="Write the results to this JSON file.")
+
+
+# Chunks are drawn from a fixed set of topics, so nearest neighbours are meaningful
+# under n-gram embeddings, and the same seed always produces the same corpus.
+class SyntheticCorpus:
+    def __init__(self, size: int, users: int, query_count: int, seed: int):
+        self.size = size
+        self.users = users
+        self.seed = seed
+
+        rng = random.Random(seed)
+        self.vocabulary = sorted(
+            {
+                "".join(rng.choices(SYLLABLES, k=rng.randint(2, 4)))
+                for _ in range(20_000)
+            }
+        )
+        self.topics = [rng.sample(self.vocabulary, 40) for _ in range(500)]
+        self.query_ids = set(rng.sample(range(size), min(query_count, size)))
+        self.queries: list[tuple[str, str]] = []
+
+    def batches(self, batch_size: int) -> Iterator[list[ContextMessage]]:
+        rng = random.Random(self.seed + 1)
+        batch = []
+        for i in range(self.size):
+            topic = rng.choice(self.topics)
+            words = [
+                rng.choice(topic) if rng.random() < 0.7 else rng.choice(self.vocabulary)
+                for _ in range(rng.randint(30, 80))
+            ]
+            user_key = f"bench-user-{i % self.users}"
+            batch.append(
+                ContextMessage(
+                    agent=rng.choice(AGENTS),
+                    content=" ".join(words),
+                    user_key=user_key,
+                    thread_id=f"bench-thread-{i % (self.users * 10)}",
+                )
+            )
+
+            # Queries paraphrase a stored chunk: a subset of its words plus noise.
+            if i in self.query_ids:
+                query = rng.sample(words, 10) + rng.choices(self.vocabulary, k=2)
+                self.queries.append((user_key, " ".join(query)))
+
+            if len(batch) == batch_size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    # quantiles needs at least two samples.
+    if len(samples) < 2:
+        value = samples[0] if samples else float("nan")
+        return {"p50": value, "p95": value, "p99": value}
+
+    cuts = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50": cuts[49], "p95": cuts[94], "p99": cuts[98]}
+
+
+async def reset_context():
+    await close_context()
+    async with engine.begin() as conn:
+        await conn.execute(
+            text(f"DROP SCHEMA IF EXISTS {config.CONTEXT_SCHEMA} CASCADE")
+        )
+
+
+async def prepare_table() -> str | None:
+    # The tenant filter index is created by the vector store along with the table.
+    async with engine.begin() as conn:
+        await conn.execute(text(f"ANALYZE {VECTOR_TABLE}"))
+        return await conn.scalar(
+            text("SELECT current_setting('hnsw.iterative_scan', true)")
+        )
+
+
+async def ingest(corpus: SyntheticCorpus, batch_size: int) -> float:
+    elapsed = 0.0
+    for i, batch in enumerate(corpus.batches(batch_size), start=1):
+        started = time.perf_counter()
+        await asyncio.to_thread(ingest_context, batch)
+        elapsed += time.perf_counter() - started
+
+        if i % 20 == 0:
+            logger.info(f"Ingested {i * batch_size} of {corpus.size} chunks.")
+    return elapsed
+
+
+async def exact_search(embedding: list[float], user_key: str, top_k: int) -> set:
+    # With index scans disabled the HNSW index is skipped, giving the true top k.
+    async with engine.begin() as conn:
+        await conn.execute(text("SET LOCAL enable_indexscan = off"))
+        result = await conn.execute(
+            text(EXACT_SEARCH),
+            {"embedding": json.dumps(embedding), "user_key": user_key, "top_k": top_k},
+        )
+        return set(result.scalars().all())
+
+
+async def measure_ann(
+    queries: list[tuple[str, list[float], set]], top_k: int, ef_search: int
+) -> dict:
+    vector_store = get_vector_store()
+    latencies, recalls = [], []
+    for user_key, embedding, expected in queries:
+        store_query = VectorStoreQuery(
+            query_embedding=embedding,
+            similarity_top_k=top_k,
+            filters=context_filters(user_key),
+        )
+        started = time.perf_counter()
+        result = await vector_store.aquery(store_query, hnsw_ef_search=ef_search)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+        if expected:
+            recalls.append(len(expected.intersection(result.ids or [])) / len(expected))
+
+    return {
+        "ef_search": ef_search,
+        "latency_ms": percentiles(latencies),
+        f"recall@{top_k}": statistics.fmean(recalls) if recalls else float("nan"),
+    }
+
+
+async def measure_search_context(queries: list[tuple[str, str]], top_k: int) -> dict:
+    # Starts from an empty result cache. Query embeddings are already cached by then,
+    # so this is the cost of the hybrid search itself.
+    await invalidate_search_results()
+    latencies = []
+    for user_key, query in queries:
+        started = time.perf_counter()
+        await search_context(query, user_key, top_k=top_k)
+        latencies.append((time.perf_counter() - started) * 1000)
+    return {"latency_ms": percentiles(latencies)}
+
+
+async def run_benchmark(
+    size: int,
+    query_count: int,
+    top_k: int,
+    ef_search: list[int],
+    users: int,
+    seed: int,
+) -> dict:
+    await reset_context()
+    corpus = SyntheticCorpus(size, users, query_count, seed)
+
+    logger.info(f"Ingesting {size} synthetic chunks into {VECTOR_TABLE}...")
+    elapsed = await ingest(corpus, config.INGEST_BATCH_SIZE)
+    iterative_scan = await prepare_table()
+
+    queries = []
+    for user_key, query in corpus.queries:
+        embedding = await embed_query(query)
+        expected = await exact_search(embedding, user_key, top_k)
+        queries.append((user_key, embedding, expected))
+
+    results = {
+        "chunks": size,
+        "queries": len(queries),
+        "iterative_scan": iterative_scan,
+        "ingest_seconds": elapsed,
+        "ingest_chunks_per_second": size / elapsed,
+        "search_context": await measure_search_context(corpus.queries, top_k),
+        "ann": [await measure_ann(queries, top_k, ef) for ef in ef_search],
+    }
+
+    logger.info(
+        f"{size} chunks: ingested at {results['ingest_chunks_per_second']:.0f}/s, "
+        "search_context p50/p95/p99 "
+        + "/".join(f"{v:.1f}" for v in results["search_context"]["latency_ms"].values())
+        + " ms"
+    )
+    for ann in results["ann"]:
+        logger.info(
+            f"  ef_search={ann['ef_search']}: recall@{top_k} "
+            f"{ann[f'recall@{top_k}']:.3f}, p50/p95/p99 "
+            + "/".join(f"{v:.1f}" for v in ann["latency_ms"].values())
+            + " ms"
+        )
+    return results
+
+
+async def main(args: argparse.Namespace) -> list[dict]:
+    try:
+        return [
+            await run_benchmark(
+                size, args.queries, args.top_k, args.ef_search, args.users, args.seed
+            )
+            for size in args.chunks
+        ]
+    finally:
+        await close_context()
+        await engine.dispose()
+        await cache.aclose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    args = cli.parse_args()
+    if config.EMBED_MODEL != HASHED_EMBED_MODEL:
+        cli.error(f"EMBED_MODEL must be {HASHED_EMBED_MODEL} to run offline.")
+    if config.CONTEXT_SCHEMA == "context":
+        cli.error("CONTEXT_SCHEMA must not be the live context schema.")
+    if config.CONTEXT_CACHE_PREFIX == "api:context":
+        cli.error("CONTEXT_CACHE_PREFIX must not be the live context cache prefix.")
+
+    results = asyncio.run(main(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
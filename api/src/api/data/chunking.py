@@ -0,0 +1,46 @@
+from collections.abc import Sequence
+from typing import Any
+
+from llama_index.core.node_parser import SemanticSplitterNodeParser
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.node_parser.node_utils import build_nodes_from_splits
+from llama_index.core.schema import BaseNode
+from llama_index.core.schema import TransformComponent
+from llama_index.core.utils import get_tokenizer
+
+__all__ = ["AdaptiveSplitter"]
+
+
+# Short texts become a single node and mid-size texts go through a sentence splitter.
+# Only long texts pay for semantic splitting, which embeds every sentence window to
+# find breakpoints before the nodes themselves are embedded.
+class AdaptiveSplitter(TransformComponent):
+    single_max_tokens: int
+    semantic_min_tokens: int
+    sentence_splitter: SentenceSplitter
+    semantic_splitter: SemanticSplitterNodeParser
+
+    def __call__(self, nodes: Sequence[BaseNode], **kwargs: Any) -> list[BaseNode]:
+        tokenizer = get_tokenizer()
+        single, sentence, semantic = [], [], []
+        for node in nodes:
+            tokens = len(tokenizer(node.get_content()))
+            if tokens <= self.single_max_tokens:
+                single.append(node)
+            elif tokens < self.semantic_min_tokens:
+                sentence.append(node)
+            else:
+                semantic.append(node)
+
+        results = []
+        for node in single:
+            (chunk,) = build_nodes_from_splits([node.get_content()], node)
+            chunk.metadata = dict(node.metadata)
+            chunk.excluded_embed_metadata_keys = list(node.excluded_embed_metadata_keys)
+            chunk.excluded_llm_metadata_keys = list(node.excluded_llm_metadata_keys)
+            results.append(chunk)
+        if sentence:
+            results.extend(self.sentence_splitter(sentence, **kwargs))
+        if semantic:
+            results.extend(self.semantic_splitter(semantic, **kwargs))
+        return results
@@ -1,89 +1,309 @@
+import functools
+import hashlib
 import os
+import threading
 from datetime import UTC
 from datetime import datetime
 
-from llama_index.core import Document
-from llama_index.core import VectorStoreIndex
-from llama_index.core.ingestion import IngestionPipeline
-from llama_index.core.node_parser import SemanticSplitterNodeParser
-from llama_index.embeddings.openai import OpenAIEmbedding
-from llama_index.storage.docstore.postgres import PostgresDocumentStore
-from llama_index.vector_stores.postgres import PGVectorStore
-
+from api.config import CHUNK_OVERLAP
+from api.config import CHUNK_SEMANTIC_MIN_TOKENS
+from api.config import CHUNK_SINGLE_MAX_TOKENS
+from api.config import CHUNK_SIZE
+from api.config import CONTEXT_SCHEMA
+from api.config import EMBED_BATCH_SIZE
 from api.config import EMBED_DIM
 from api.config import EMBED_MODEL
+from api.config import POSTGRES_HOST
 from api.config import POSTGRES_URL
+from api.context_cache import get_query_embedding
+from api.context_cache import get_search_generation
+from api.context_cache import get_search_results
+from api.context_cache import set_query_embedding
+from api.context_cache import set_search_results
+from api.models import ContextChunk
 from api.models import ContextMessage
 
-__all__ = ["ingest_context", "search_context"]
+__all__ = [
+    "close_context",
+    "embed_query",
+    "get_ingestion_pipeline",
+    "ingest_context",
+    "preload_context",
+    "search_context",
+]
 
 os.environ["PG_CONN_STR"] = f"postgresql://{POSTGRES_URL}"
 
-text_embedder = OpenAIEmbedding(
-    model=EMBED_MODEL,
-    dimensions=EMBED_DIM,
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
-
-splitter = SemanticSplitterNodeParser(
-    buffer_size=2,
-    embed_model=text_embedder,
-    breakpoint_percentile_threshold=90,
-)
-
-document_store = PostgresDocumentStore.from_uri(
-    uri=f"postgresql://{POSTGRES_URL}",
-    table_name="documents",
-    schema_name="context",
-    use_jsonb=True,
-)
-
-vector_store = PGVectorStore.from_params(
-    host="postgres",
-    port="5432",
-    database="terra",
-    user=os.getenv("POSTGRES_USER"),
-    password=os.getenv("POSTGRES_PASSWORD"),
-    table_name="vectors",
-    schema_name="context",
-    hybrid_search=True,
-    embed_dim=EMBED_DIM,
-    use_jsonb=True,
-    hnsw_kwargs={"hnsw_ef_construction": 400, "hnsw_m": 16, "hnsw_ef_search": 100},
-)
-
-vector_index = VectorStoreIndex.from_vector_store(vector_store=vector_store)
-
-ingestion_pipeline = IngestionPipeline(
-    transformations=[
-        splitter,
-        text_embedder,
-    ],
-    vector_store=vector_store,
-)
+# Kept for filtering and display, but left out of the text that is embedded and
+# counted against chunk sizes.
+CONTEXT_ONLY_METADATA = ["timestamp", "user_key", "thread_id"]
+
+TENANT_INDEX = """
+CREATE INDEX IF NOT EXISTS ix_data_vectors_user_key_thread_id
+ON {table} ((metadata_->>'user_key'), (metadata_->>'thread_id'))
+"""
+
+# llama_index and its stores are imported and built on first use, so importing the
+# API stays cheap and does not need Postgres or OpenAI to be reachable.
+
+# Ingestion calls the getters from worker threads, and functools.cache lets two
+# threads that miss at the same time both build the object. Misses are built under
+# a lock, which is reentrant because the getters call each other.
+_build_lock = threading.RLock()
+
+
+def locked_cache(func):
+    cached = functools.cache(func)
+
+    @functools.wraps(func)
+    def getter():
+        if cached.cache_info().currsize:
+            return cached()
+        with _build_lock:
+            return cached()
+
+    getter.cache_info = cached.cache_info
+    getter.cache_clear = cached.cache_clear
+    return getter
+
+
+@locked_cache
+def get_text_embedder():
+    from api.data.embeddings import HASHED_EMBED_MODEL
+    from api.data.embeddings import HashedNgramEmbedding
+
+    if EMBED_MODEL == HASHED_EMBED_MODEL:
+        return HashedNgramEmbedding(
+            embed_dim=EMBED_DIM,
+            embed_batch_size=EMBED_BATCH_SIZE,
+        )
+
+    from llama_index.embeddings.openai import OpenAIEmbedding
+
+    return OpenAIEmbedding(
+        model=EMBED_MODEL,
+        dimensions=EMBED_DIM,
+        embed_batch_size=EMBED_BATCH_SIZE,
+        api_key=os.getenv("OPENAI_API_KEY"),
+    )
+
+
+@locked_cache
+def get_splitter():
+    from api.data.chunking import AdaptiveSplitter
+    from llama_index.core.node_parser import SemanticSplitterNodeParser
+    from llama_index.core.node_parser import SentenceSplitter
+
+    return AdaptiveSplitter(
+        single_max_tokens=CHUNK_SINGLE_MAX_TOKENS,
+        semantic_min_tokens=CHUNK_SEMANTIC_MIN_TOKENS,
+        sentence_splitter=SentenceSplitter(
+            chunk_size=CHUNK_SIZE,
+            chunk_overlap=CHUNK_OVERLAP,
+        ),
+        semantic_splitter=SemanticSplitterNodeParser(
+            buffer_size=2,
+            embed_model=get_text_embedder(),
+            breakpoint_percentile_threshold=90,
+        ),
+    )
+
+
+@locked_cache
+def get_document_store():
+    from llama_index.storage.docstore.postgres import PostgresDocumentStore
+
+    return PostgresDocumentStore.from_uri(
+        uri=f"postgresql://{POSTGRES_URL}",
+        table_name="documents",
+        schema_name=CONTEXT_SCHEMA,
+        use_jsonb=True,
+    )
+
+
+@locked_cache
+def get_vector_store():
+    from llama_index.vector_stores.postgres import PGVectorStore
+    from sqlalchemy import text
+
+    class ContextVectorStore(PGVectorStore):
+        # The table is created on first use, which can be after migrations ran, so
+        # the tenant filter index is created along with it.
+        def _create_tables_if_not_exists(self) -> None:
+            super()._create_tables_if_not_exists()
+            table = f"{self.schema_name}.{self._table_class.__tablename__}"
+            with self._session() as session, session.begin():
+                session.execute(text(TENANT_INDEX.format(table=table)))
+
+    return ContextVectorStore.from_params(
+        host=POSTGRES_HOST,
+        port="5432",
+        database="terra",
+        user=os.getenv("POSTGRES_USER"),
+        password=os.getenv("POSTGRES_PASSWORD"),
+        table_name="vectors",
+        schema_name=CONTEXT_SCHEMA,
+        hybrid_search=True,
+        embed_dim=EMBED_DIM,
+        use_jsonb=True,
+        hnsw_kwargs={
+            "hnsw_ef_construction": 400,
+            "hnsw_m": 16,
+            "hnsw_ef_search": 100,
+        },
+    )
+
+
+@locked_cache
+def get_ingestion_pipeline():
+    from llama_index.core.ingestion import IngestionPipeline
+
+    # Deduplication against the docstore happens in ingest_context, not here.
+    return IngestionPipeline(
+        transformations=[
+            get_splitter(),
+            get_text_embedder(),
+        ],
+        vector_store=get_vector_store(),
+    )
+
+
+@locked_cache
+def get_document_class():
+    from llama_index.core import Document
+
+    class ContextDocument(Document):
+        # The default hash covers metadata, which includes the save timestamp.
+        @property
+        def hash(self) -> str:
+            return self.id_
+
+    return ContextDocument
+
+
+def content_hash(message: ContextMessage) -> str:
+    parts = (message.user_key, message.thread_id, message.agent, message.content)
+    identity = "\x00".join(p or "" for p in parts)
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()
+
+
+def preload_context():
+    # Only imports the libraries; clients and connections are still built lazily, so
+    # nothing holding a socket is inherited by forked workers.
+    import api.data.chunking  # noqa: F401
+    import api.data.embeddings  # noqa: F401
+    import llama_index.core  # noqa: F401
+    import llama_index.core.ingestion  # noqa: F401
+    import llama_index.core.node_parser  # noqa: F401
+    import llama_index.core.vector_stores  # noqa: F401
+    import llama_index.embeddings.openai  # noqa: F401
+    import llama_index.storage.docstore.postgres  # noqa: F401
+    import llama_index.vector_stores.postgres  # noqa: F401
+
+
+async def close_context():
+    if get_vector_store.cache_info().currsize:
+        await get_vector_store().close()
+
+    for getter in (
+        get_ingestion_pipeline,
+        get_vector_store,
+        get_document_store,
+        get_document_class,
+        get_splitter,
+        get_text_embedder,
+    ):
+        getter.cache_clear()
 
 
 def ingest_context(messages: list[ContextMessage]):
+    document_class = get_document_class()
     documents = [
-        Document(
+        document_class(
+            id_=content_hash(message),
             text=message.content,
             metadata={
                 "agent": message.agent,
                 "timestamp": datetime.now(UTC).isoformat(),
+                "user_key": message.user_key,
+                "thread_id": message.thread_id,
             },
+            excluded_embed_metadata_keys=CONTEXT_ONLY_METADATA,
+            excluded_llm_metadata_keys=CONTEXT_ONLY_METADATA,
         )
         for message in messages
     ]
-    ingestion_pipeline.run(documents)
-    vector_index.refresh_ref_docs(documents)
 
+    # Documents are keyed by a hash of their content, so re-saving unchanged content
+    # is skipped before it is split, embedded or written to the vector store. The
+    # pipeline's own docstore strategy records hashes before the vectors are written,
+    # so a failed run would leave the content marked as ingested. Hashes are only
+    # recorded here once the vector store write has succeeded.
+    docstore = get_document_store()
+    pending = {
+        document.id_: document
+        for document in documents
+        if docstore.get_document_hash(document.id_) is None
+    }
+    if not pending:
+        return
+
+    get_ingestion_pipeline().run(documents=list(pending.values()))
+    docstore.set_document_hashes({doc_id: doc.hash for doc_id, doc in pending.items()})
+    docstore.add_documents(list(pending.values()), store_text=False)
+
+
+async def embed_query(query: str) -> list[float]:
+    embedding = await get_query_embedding(query)
+    if embedding is None:
+        embedding = await get_text_embedder().aget_query_embedding(query)
+        await set_query_embedding(query, embedding)
+    return embedding
+
+
+def context_filters(user_key: str, thread_id: str | None = None):
+    from llama_index.core.vector_stores import MetadataFilter
+    from llama_index.core.vector_stores import MetadataFilters
+
+    filters = [MetadataFilter(key="user_key", value=user_key)]
+    if thread_id:
+        filters.append(MetadataFilter(key="thread_id", value=thread_id))
+    return MetadataFilters(filters=filters)
 
-def search_context(query: str, top_k: int = 10) -> list[Document]:
-    retriever = vector_index.as_retriever(
-        vector_store_query_mode="hybrid",
+
+async def search_context(
+    query: str, user_key: str, thread_id: str | None = None, top_k: int = 10
+) -> list[ContextChunk]:
+    from llama_index.core.vector_stores import VectorStoreQuery
+    from llama_index.core.vector_stores import VectorStoreQueryMode
+
+    scope = f"{user_key}:{thread_id or '*'}"
+    generation = await get_search_generation()
+    if generation is not None:
+        results = await get_search_results(generation, scope, query, top_k)
+        if results is not None:
+            return results
+
+    # Both the HNSW and the full text search are restricted to the caller's own
+    # context, so their cost follows one user's archive rather than the whole table.
+    store_query = VectorStoreQuery(
+        query_embedding=await embed_query(query),
+        query_str=query,
         similarity_top_k=top_k,
         sparse_top_k=top_k,
-        embed_model=text_embedder,
+        mode=VectorStoreQueryMode.HYBRID,
+        filters=context_filters(user_key, thread_id),
     )
-    response = retriever.retrieve(query)
-    return response
+    response = await get_vector_store().aquery(store_query)
+    results = [
+        ContextChunk(
+            timestamp=datetime.fromisoformat(n.metadata["timestamp"]),
+            agent=n.metadata["agent"],
+            content=n.get_content(),
+        )
+        for n in response.nodes or []
+    ]
+
+    if generation is not None:
+        await set_search_results(generation, scope, query, top_k, results)
+    return results
@@ -0,0 +1,60 @@
+import functools
+import hashlib
+import math
+import re
+
+from llama_index.core.base.embeddings.base import BaseEmbedding
+
+__all__ = ["HASHED_EMBED_MODEL", "HashedNgramEmbedding"]
+
+HASHED_EMBED_MODEL = "hashed-ngram"
+
+WORD_PATTERN = re.compile(r"\w+")
+
+
+@functools.lru_cache(maxsize=200_000)
+def hashed_features(
+    word: str, dim: int, ngram_min: int, ngram_max: int
+) -> tuple[tuple[int, float], ...]:
+    padded = f"<{word}>"
+    features = [word]
+    for n in range(ngram_min, ngram_max + 1):
+        features.extend(padded[i : i + n] for i in range(len(padded) - n + 1))
+
+    buckets = []
+    for feature in features:
+        digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+        value = int.from_bytes(digest, "little")
+        buckets.append((value % dim, 1.0 if value >> 63 else -1.0))
+    return tuple(buckets)
+
+
+# Deterministic, offline stand-in for the OpenAI embedder, used to benchmark ingestion
+# and search without network calls. Words and their character n-grams are hashed into
+# signed buckets, so texts sharing vocabulary land close together under cosine distance.
+class HashedNgramEmbedding(BaseEmbedding):
+    model_name: str = HASHED_EMBED_MODEL
+    embed_dim: int
+    ngram_min: int = 3
+    ngram_max: int = 5
+
+    def _embed(self, text: str) -> list[float]:
+        vector = [0.0] * self.embed_dim
+        for word in WORD_PATTERN.findall(text.casefold()):
+            features = hashed_features(
+                word, self.embed_dim, self.ngram_min, self.ngram_max
+            )
+            for index, sign in features:
+                vector[index] += sign
+
+        norm = math.sqrt(sum(v * v for v in vector))
+        return [v / norm for v in vector] if norm else vector
+
+    def _get_query_embedding(self, query: str) -> list[float]:
+        return self._embed(query)
+
+    async def _aget_query_embedding(self, query: str) -> list[float]:
+        return self._embed(query)
+
+    def _get_text_embedding(self, text: str) -> list[float]:
+        return self._embed(text)
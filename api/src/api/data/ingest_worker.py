@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+import os
+import signal
+import socket
+
+import api.config as config
+from api.context_cache import invalidate_search_results
+from api.data.context import close_context
+from api.data.context import ingest_context
+from api.ingest_queue import INGEST_DEAD_STREAM
+from api.ingest_queue import INGEST_GROUP
+from api.ingest_queue import INGEST_STREAM
+from api.ingest_queue import ensure_ingest_group
+from api.ingest_queue import ingest_queue_metrics
+from api.models import ContextMessage
+from api.utils import cache
+from api.utils import logger
+
+__all__ = ["IngestWorker"]
+
+
+class IngestWorker:
+    def __init__(
+        self,
+        batch_size: int = config.INGEST_BATCH_SIZE,
+        batch_wait_ms: int = config.INGEST_BATCH_WAIT_MS,
+        concurrency: int = config.INGEST_CONCURRENCY,
+    ):
+        self.name = f"{socket.gethostname()}-{os.getpid()}"
+        self.batch_size = batch_size
+        self.batch_wait_ms = batch_wait_ms
+        self.concurrency = concurrency
+
+        self._stopping = asyncio.Event()
+        self._tasks: set[asyncio.Task] = set()
+
+    def stop(self):
+        self._stopping.set()
+
+    async def run(self):
+        await ensure_ingest_group()
+        slots = asyncio.Semaphore(self.concurrency)
+        logger.info(f"Ingest worker {self.name} started.")
+
+        while not self._stopping.is_set():
+            await slots.acquire()
+            entries = await self._claim_stale() or await self._collect()
+            if not entries:
+                slots.release()
+                continue
+
+            task = asyncio.create_task(self._ingest(entries, slots))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        if self._tasks:
+            await asyncio.gather(*self._tasks)
+        logger.info(f"Ingest worker {self.name} stopped.")
+
+    async def _collect(self) -> list[tuple[str, list[dict]]]:
+        # Keep reading until the batch is full or the wait since the first entry runs
+        # out, so that messages from many requests share embedding calls.
+        loop = asyncio.get_running_loop()
+        entries = []
+        count = 0
+        deadline = None
+
+        while count < self.batch_size and not self._stopping.is_set():
+            if deadline is None:
+                block = self.batch_wait_ms
+            else:
+                block = int((deadline - loop.time()) * 1000)
+                if block <= 0:
+                    break
+
+            response = await cache.xreadgroup(
+                INGEST_GROUP,
+                self.name,
+                {INGEST_STREAM: ">"},
+                count=self.batch_size - count,
+                block=block,
+            )
+            if not response:
+                if entries:
+                    break
+                continue
+
+            for entry_id, fields in response[0][1]:
+                messages = json.loads(fields["messages"])
+                entries.append((entry_id, messages))
+                count += len(messages)
+
+            if deadline is None:
+                deadline = loop.time() + self.batch_wait_ms / 1000
+
+        return entries
+
+    async def _claim_stale(self) -> list[tuple[str, list[dict]]]:
+        stale = await cache.xpending_range(
+            INGEST_STREAM,
+            INGEST_GROUP,
+            min="-",
+            max="+",
+            count=self.batch_size,
+            idle=config.INGEST_CLAIM_IDLE_MS,
+        )
+        if not stale:
+            return []
+
+        retry = [p["message_id"] for p in stale]
+        dead = [
+            p["message_id"]
+            for p in stale
+            if p["times_delivered"] >= config.INGEST_MAX_ATTEMPTS
+        ]
+        if dead:
+            await self._dead_letter(dead)
+            retry = [entry_id for entry_id in retry if entry_id not in dead]
+        if not retry:
+            return []
+
+        claimed = await cache.xclaim(
+            INGEST_STREAM,
+            INGEST_GROUP,
+            self.name,
+            min_idle_time=config.INGEST_CLAIM_IDLE_MS,
+            message_ids=retry,
+        )
+        return [
+            (entry_id, json.loads(fields["messages"]))
+            for entry_id, fields in claimed
+            if fields
+        ]
+
+    async def _dead_letter(self, entry_ids: list[str]):
+        for entry_id in entry_ids:
+            entries = await cache.xrange(INGEST_STREAM, min=entry_id, max=entry_id)
+            for _, fields in entries:
+                await cache.xadd(INGEST_DEAD_STREAM, {"id": entry_id, **fields})
+        await cache.xack(INGEST_STREAM, INGEST_GROUP, *entry_ids)
+        await cache.xdel(INGEST_STREAM, *entry_ids)
+        logger.error(f"Moved {len(entry_ids)} ingest entries to the dead letter queue.")
+
+    async def _ingest_entries(self, entries: list[tuple[str, list[dict]]]) -> int:
+        messages = [
+            ContextMessage.model_validate(m) for _, batch in entries for m in batch
+        ]
+        if messages:
+            await asyncio.to_thread(ingest_context, messages)
+        return len(messages)
+
+    async def _ingest_each(
+        self, entries: list[tuple[str, list[dict]]]
+    ) -> tuple[list[str], int]:
+        # Entries come from unrelated requests, so one bad message must not hold back
+        # the rest. Content is only recorded in the docstore once its vectors are
+        # written, so nothing from the failed batch is skipped as already ingested.
+        done, ingested = [], 0
+        for entry_id, batch in entries:
+            try:
+                ingested += await self._ingest_entries([(entry_id, batch)])
+            except Exception as e:
+                # Left pending, so the entry is retried and eventually dead-lettered.
+                logger.error(f"Failed to ingest queue entry {entry_id}: {e}")
+            else:
+                done.append(entry_id)
+        return done, ingested
+
+    async def _ingest(
+        self, entries: list[tuple[str, list[dict]]], slots: asyncio.Semaphore
+    ):
+        try:
+            try:
+                ingested = await self._ingest_entries(entries)
+                done = [entry_id for entry_id, _ in entries]
+            except Exception as e:
+                if len(entries) == 1:
+                    logger.error(f"Failed to ingest queue entry {entries[0][0]}: {e}")
+                    done, ingested = [], 0
+                else:
+                    logger.warning(
+                        f"Failed to ingest {len(entries)} queue entries together, "
+                        f"retrying them one by one: {e}"
+                    )
+                    done, ingested = await self._ingest_each(entries)
+
+            # Only entries whose ingest_context call returned are acked; the rest
+            # stay pending for claiming and dead-lettering.
+            if done:
+                await cache.xack(INGEST_STREAM, INGEST_GROUP, *done)
+                await cache.xdel(INGEST_STREAM, *done)
+                await invalidate_search_results()
+        finally:
+            slots.release()
+
+        if not done:
+            return
+        metrics = await ingest_queue_metrics()
+        logger.info(
+            f"Ingested {ingested} messages from {len(done)} requests; "
+            f"queue lag {metrics['lag_seconds']:.1f}s, {metrics['pending']} pending."
+        )
+
+
+async def main():
+    worker = IngestWorker()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, worker.stop)
+
+    try:
+        await worker.run()
+    finally:
+        await close_context()
+        await cache.aclose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
@@ -0,0 +1,121 @@
+import asyncio
+import logging
+
+from api.data.schemas import Base
+from api.utils import engine
+from api.utils import logger
+
+from shared.migrations import Migration
+from shared.migrations import MigrationRunner
+
+__all__ = ["MIGRATIONS", "run_migrations"]
+
+NAMESPACE = "api"
+
+MIGRATIONS = [
+    Migration(
+        version="0001_initial",
+        statements=[
+            "CREATE SCHEMA IF NOT EXISTS users",
+            "CREATE SCHEMA IF NOT EXISTS conversations",
+        ],
+        create_all=True,
+    ),
+    Migration(
+        version="0002_conversation_indexes",
+        statements=[
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_messages_thread_id_timestamp
+            ON conversations.messages (thread_id, timestamp)
+            """,
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_threads_user_id_last_used
+            ON conversations.threads (user_id, last_used)
+            WHERE is_deleted = false
+            """,
+        ],
+        concurrent=True,
+    ),
+    Migration(
+        version="0003_message_encoding",
+        statements=[
+            """
+            ALTER TABLE conversations.messages
+            ADD COLUMN IF NOT EXISTS encoding SMALLINT NOT NULL DEFAULT 0
+            """,
+        ],
+    ),
+    Migration(
+        version="0004_archived_threads",
+        create_all=True,
+    ),
+    Migration(
+        version="0005_context_tenant_filters",
+        statements=[
+            # The vector table is created by the vector store on first use, which
+            # adds this index itself. This covers tables that already existed.
+            """
+            DO $$
+            BEGIN
+                IF to_regclass('context.data_vectors') IS NOT NULL THEN
+                    CREATE INDEX IF NOT EXISTS ix_data_vectors_user_key_thread_id
+                    ON context.data_vectors (
+                        (metadata_->>'user_key'), (metadata_->>'thread_id')
+                    );
+                END IF;
+            END $$
+            """,
+            # Lets filtered HNSW scans keep walking the graph until enough rows pass
+            # the tenant filter. Needs pgvector 0.8; older versions keep post-filtering.
+            """
+            DO $$
+            BEGIN
+                EXECUTE format(
+                    'ALTER DATABASE %I SET hnsw.iterative_scan = %L',
+                    current_database(),
+                    'relaxed_order'
+                );
+            EXCEPTION WHEN OTHERS THEN
+                RAISE NOTICE 'hnsw.iterative_scan not set: %', SQLERRM;
+            END $$
+            """,
+        ],
+    ),
+    Migration(
+        version="0006_message_updated_at",
+        statements=[
+            """
+            ALTER TABLE conversations.messages
+            ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ NOT NULL DEFAULT now()
+            """,
+        ],
+    ),
+    Migration(
+        version="0007_thread_rehydrated_at",
+        statements=[
+            """
+            ALTER TABLE conversations.threads
+            ADD COLUMN IF NOT EXISTS rehydrated_at TIMESTAMPTZ
+            """,
+        ],
+    ),
+]
+
+
+async def run_migrations():
+    runner = MigrationRunner(
+        engine, NAMESPACE, MIGRATIONS, lambda: Base.metadata, logger
+    )
+    await runner.run()
+
+
+async def main():
+    try:
+        await run_migrations()
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main())
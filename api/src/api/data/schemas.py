@@ -1,11 +1,15 @@
 from sqlalchemy import Boolean
 from sqlalchemy import Column
 from sqlalchemy import ForeignKey
+from sqlalchemy import Index
+from sqlalchemy import Integer
+from sqlalchemy import SmallInteger
 from sqlalchemy import String
 from sqlalchemy.dialects.postgresql import BYTEA
 from sqlalchemy.dialects.postgresql import TIMESTAMP
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.sql import func
+from sqlalchemy.sql import text
 
 Base = declarative_base()
 
@@ -38,7 +42,15 @@ class SessionSchema(Base):
 
 class ThreadSchema(Base):
     __tablename__ = "threads"
-    __table_args__ = {"schema": "conversations"}
+    __table_args__ = (
+        Index(
+            "ix_threads_user_id_last_used",
+            "user_id",
+            "last_used",
+            postgresql_where=text("is_deleted = false"),
+        ),
+        {"schema": "conversations"},
+    )
 
     id = Column(String, primary_key=True)
     user_id = Column(String, nullable=False)
@@ -50,11 +62,15 @@ class ThreadSchema(Base):
         onupdate=func.now(),
     )
     is_deleted = Column(Boolean, nullable=False, default=False)
+    rehydrated_at = Column(TIMESTAMP(timezone=True))
 
 
 class MessageSchema(Base):
     __tablename__ = "messages"
-    __table_args__ = {"schema": "conversations"}
+    __table_args__ = (
+        Index("ix_messages_thread_id_timestamp", "thread_id", "timestamp"),
+        {"schema": "conversations"},
+    )
 
     id = Column(String, primary_key=True)
     thread_id = Column(String, ForeignKey("conversations.threads.id"), nullable=False)
@@ -62,3 +78,23 @@ class MessageSchema(Base):
     content = Column(BYTEA, nullable=False)
     timestamp = Column(TIMESTAMP(timezone=True), nullable=False)
     model = Column(String)
+    encoding = Column(SmallInteger, nullable=False, server_default="0")
+    updated_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
+    )
+
+
+class ArchivedThreadSchema(Base):
+    __tablename__ = "archived_threads"
+    __table_args__ = {"schema": "conversations"}
+
+    id = Column(String, primary_key=True)
+    user_id = Column(String, nullable=False)
+    summary = Column(BYTEA, nullable=False)
+    last_used = Column(TIMESTAMP(timezone=True), nullable=False)
+    is_deleted = Column(Boolean, nullable=False, default=False)
+    message_count = Column(Integer, nullable=False)
+    messages = Column(BYTEA, nullable=False)
+    archived_at = Column(
+        TIMESTAMP(timezone=True), nullable=False, server_default=func.now()
+    )
@@ -0,0 +1,48 @@
+import api.config as config
+import zstandard
+
+__all__ = ["ENVELOPE_VERSION", "pack", "unpack"]
+
+# Payloads written before envelopes existed are raw UTF-8 text. A leading NUL byte
+# never occurs in that text, so it marks a versioned envelope unambiguously.
+ENVELOPE_PREFIX = b"\x00te"
+ENVELOPE_VERSION = 1
+
+CODEC_RAW = 0
+CODEC_ZSTD = 1
+
+
+class EnvelopeError(ValueError):
+    pass
+
+
+def pack(data: bytes) -> bytes:
+    if len(data) >= config.COMPRESSION_THRESHOLD:
+        compressed = zstandard.ZstdCompressor(level=config.COMPRESSION_LEVEL).compress(
+            data
+        )
+        if len(compressed) < len(data):
+            return _header(CODEC_ZSTD) + compressed
+
+    return _header(CODEC_RAW) + data
+
+
+def unpack(payload: bytes) -> bytes:
+    if not payload.startswith(ENVELOPE_PREFIX):
+        return payload
+
+    header_size = len(ENVELOPE_PREFIX) + 2
+    version, codec = payload[len(ENVELOPE_PREFIX) : header_size]
+    if version != ENVELOPE_VERSION:
+        raise EnvelopeError(f"Unsupported envelope version: {version}")
+
+    body = payload[header_size:]
+    if codec == CODEC_RAW:
+        return body
+    if codec == CODEC_ZSTD:
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise EnvelopeError(f"Unsupported envelope codec: {codec}")
+
+
+def _header(codec: int) -> bytes:
+    return ENVELOPE_PREFIX + bytes([ENVELOPE_VERSION, codec])
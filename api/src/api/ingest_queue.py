@@ -0,0 +1,68 @@
+import json
+import time
+
+import api.config as config
+from api.models import ContextMessage
+from api.utils import cache
+from redis.exceptions import ResponseError
+
+__all__ = ["enqueue_context", "ensure_ingest_group", "ingest_queue_metrics"]
+
+INGEST_STREAM = "api:context:ingest"
+INGEST_DEAD_STREAM = "api:context:ingest:dead"
+INGEST_GROUP = "ingest"
+
+
+def entry_age_ms(entry_id: str, now_ms: int | None = None) -> int:
+    if now_ms is None:
+        now_ms = int(time.time() * 1000)
+    return max(now_ms - int(entry_id.split("-")[0]), 0)
+
+
+async def enqueue_context(messages: list[ContextMessage]) -> str:
+    payload = json.dumps([m.model_dump() for m in messages])
+    return await cache.xadd(
+        INGEST_STREAM,
+        {"messages": payload},
+        maxlen=config.INGEST_STREAM_MAXLEN,
+        approximate=True,
+    )
+
+
+async def ensure_ingest_group():
+    try:
+        await cache.xgroup_create(INGEST_STREAM, INGEST_GROUP, id="0", mkstream=True)
+    except ResponseError as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+async def ingest_queue_metrics() -> dict:
+    await ensure_ingest_group()
+    group = next(
+        g for g in await cache.xinfo_groups(INGEST_STREAM) if g["name"] == INGEST_GROUP
+    )
+    pending = await cache.xpending(INGEST_STREAM, INGEST_GROUP)
+
+    # The oldest unfinished entry is either still pending on a consumer or the first
+    # one the group has not been handed yet.
+    oldest = []
+    if pending["pending"]:
+        oldest.append(pending["min"])
+    undelivered = await cache.xrange(
+        INGEST_STREAM, min=f"({group['last-delivered-id']}", count=1
+    )
+    if undelivered:
+        oldest.append(undelivered[0][0])
+
+    now_ms = int(time.time() * 1000)
+    return {
+        "length": await cache.xlen(INGEST_STREAM),
+        "undelivered": group.get("lag"),
+        "pending": pending["pending"],
+        "consumers": group["consumers"],
+        "dead_letters": await cache.xlen(INGEST_DEAD_STREAM),
+        "lag_seconds": (
+            max(entry_age_ms(e, now_ms) for e in oldest) / 1000 if oldest else 0.0
+        ),
+    }
@@ -0,0 +1,129 @@
+import asyncio
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import api.config as config
+from api.utils import logger
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+__all__ = ["RSAKeyPool", "generate_rsa_key_pair", "key_pool"]
+
+RATE_WINDOW = 60
+
+
+def generate_rsa_key_pair() -> tuple[bytes, bytes]:
+    key = rsa.generate_private_key(
+        public_exponent=65537,
+        key_size=2048,
+    )
+    private_key = key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    public_key = key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return private_key, public_key
+
+
+class RSAKeyPool:
+    def __init__(self, size: int):
+        self.size = size
+
+        self._keys: deque[tuple[bytes, bytes]] = deque()
+        self._executor = None
+        self._task = None
+        self._wakeup = asyncio.Event()
+
+        self._generated = 0
+        self._served = 0
+        self._misses = 0
+        self._refills: deque[float] = deque()
+
+    @property
+    def depth(self) -> int:
+        return len(self._keys)
+
+    @property
+    def refill_rate(self) -> float:
+        self._trim_refills(time.monotonic())
+        return len(self._refills) / RATE_WINDOW
+
+    def _trim_refills(self, now: float):
+        while self._refills and now - self._refills[0] > RATE_WINDOW:
+            self._refills.popleft()
+
+    def metrics(self) -> dict:
+        return {
+            "size": self.size,
+            "depth": self.depth,
+            "running": self._task is not None and not self._task.done(),
+            "generated": self._generated,
+            "served": self._served,
+            "misses": self._misses,
+            "refill_rate_per_sec": self.refill_rate,
+        }
+
+    def get(self) -> tuple[bytes, bytes] | None:
+        try:
+            key_pair = self._keys.popleft()
+        except IndexError:
+            self._misses += 1
+            key_pair = None
+        else:
+            self._served += 1
+
+        self._wakeup.set()
+        return key_pair
+
+    async def start(self):
+        if self.size <= 0 or self._task:
+            return
+
+        self._executor = ProcessPoolExecutor(max_workers=1)
+        self._task = asyncio.create_task(self._refill())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        if self._executor:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def _refill(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            if self.depth >= self.size:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+
+            try:
+                key_pair = await loop.run_in_executor(
+                    self._executor, generate_rsa_key_pair
+                )
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Failed to pre-generate RSA key pair: {e}")
+                await asyncio.sleep(1)
+                continue
+
+            now = time.monotonic()
+            self._keys.append(key_pair)
+            self._generated += 1
+            self._refills.append(now)
+            self._trim_refills(now)
+
+
+key_pool = RSAKeyPool(size=config.KEY_POOL_SIZE)
@@ -1,23 +1,32 @@
+import asyncio
 from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from api.auth import invalidate_session
+from api.data.context import close_context
+from api.keypool import key_pool
+from api.routers import internal_router
 from api.routers import sessions_router
 from api.routers import threads_router
+from api.session_cache import listen_session_revocations
+from api.workers import crypto_pool
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    from api.data.schemas import Base
-    from api.utils import engine
-
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-
+    crypto_pool.start()
+    await key_pool.start()
+    revocations = asyncio.create_task(listen_session_revocations(invalidate_session))
     yield
+    revocations.cancel()
+    await key_pool.stop()
+    crypto_pool.stop()
+    await close_context()
 
 
 app = FastAPI(lifespan=lifespan)
 
 app.include_router(threads_router)
 app.include_router(sessions_router)
+app.include_router(internal_router)
@@ -3,6 +3,7 @@ from .models import ContextMessage
 from .models import ConversationThread
 from .models import Session
 from .models import ThreadMessage
+from .models import ThreadMessageBatch
 from .models import User
 
 __all__ = [
@@ -10,6 +11,7 @@ __all__ = [
     "Session",
     "ConversationThread",
     "ThreadMessage",
+    "ThreadMessageBatch",
     "ContextMessage",
     "ContextChunk",
 ]
@@ -1,11 +1,10 @@
 from datetime import datetime
-from typing import Self
 
 from pydantic import BaseModel
 
 import shared.models as models
-from api.auth import decrypt_user_data
 from api.auth import encrypt_user_data
+from api.envelope import ENVELOPE_VERSION
 
 
 class User(models.User):
@@ -25,37 +24,24 @@ class ConversationThread(models.ConversationThread):
         model_dict["summary"] = encrypt_user_data(key, model_dict["summary"])
         return model_dict
 
-    @classmethod
-    def decrypt(cls, schema, key: bytes) -> Self:
-        model_dict = {
-            "id": schema.id,
-            "summary": decrypt_user_data(key, schema.summary),
-            "last_used": schema.last_used,
-        }
-        return cls.model_validate(model_dict)
-
 
 class ThreadMessage(models.ThreadMessage):
     def encrypt(self, key: bytes, **kwargs) -> dict:
         model_dict = self.model_dump(**kwargs)
         model_dict["content"] = encrypt_user_data(key, model_dict["content"])
+        model_dict["encoding"] = ENVELOPE_VERSION
         return model_dict
 
-    @classmethod
-    def decrypt(cls, schema, key: bytes) -> Self:
-        model_dict = {
-            "id": schema.id,
-            "thread_id": schema.thread_id,
-            "role": schema.role,
-            "content": decrypt_user_data(key, schema.content),
-            "timestamp": schema.timestamp,
-            "model": schema.model,
-        }
-        return cls.model_validate(model_dict)
+
+class ThreadMessageBatch(BaseModel):
+    thread: ConversationThread | None = None
+    messages: list[ThreadMessage] = []
 
 
 class ContextMessage(models.ContextMessage):
-    pass
+    # Set by the API from the authenticated request, never taken from the client.
+    user_key: str | None = None
+    thread_id: str | None = None
 
 
 class ContextChunk(BaseModel):
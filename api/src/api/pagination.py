@@ -0,0 +1,18 @@
+import base64
+from datetime import datetime
+
+__all__ = ["encode_cursor", "decode_cursor"]
+
+
+def encode_cursor(timestamp: datetime, key: str) -> str:
+    cursor = f"{timestamp.isoformat()}|{key}"
+    return base64.urlsafe_b64encode(cursor.encode("utf-8")).decode("utf-8")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode("utf-8")).decode("utf-8")
+        timestamp, key = raw.split("|", 1)
+        return datetime.fromisoformat(timestamp), key
+    except ValueError as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
@@ -1,5 +1,6 @@
+from .internal import router as internal_router
 from .sessions import router as sessions_router
 from .threads import threads_router
 from .users import router as users_router
 
-__all__ = ["threads_router", "users_router", "sessions_router"]
+__all__ = ["threads_router", "users_router", "sessions_router", "internal_router"]
@@ -0,0 +1,32 @@
+from api.ingest_queue import ingest_queue_metrics
+from api.keypool import key_pool
+from api.utils import engine
+from fastapi import APIRouter
+
+from shared.engine import pool_metrics
+
+router = APIRouter(tags=["internal"], prefix="/internal", include_in_schema=False)
+
+
+@router.get(
+    "/metrics/keypool",
+    summary="Reports the depth and refill rate of the pre-generated RSA key pool.",
+)
+async def get_keypool_metrics() -> dict:
+    return key_pool.metrics()
+
+
+@router.get(
+    "/metrics/database",
+    summary="Reports connection pool usage for this worker's database engine.",
+)
+async def get_database_metrics() -> dict:
+    return pool_metrics(engine)
+
+
+@router.get(
+    "/metrics/ingest",
+    summary="Reports the depth and lag of the context ingestion queue.",
+)
+async def get_ingest_metrics() -> dict:
+    return await ingest_queue_metrics()
@@ -7,16 +7,21 @@ from fastapi import HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import delete
 from sqlalchemy.sql import select
 
 import api.auth as auth
+import api.config as config
 from api.data.schemas import SessionSchema
 from api.models import Session
+from api.session_cache import publish_session_revoked
+from api.session_cache import set_session_validity
 from api.utils import database_session
 
 router = APIRouter(tags=["session"], prefix="/session")
 
 DatabaseSession = Annotated[AsyncSession, Depends(database_session)]
+UserAuth = Annotated[auth.AuthPayload, Depends(auth.authenticate_request)]
 
 
 @router.put(
@@ -30,6 +35,7 @@ async def save_session(session: Session, db: DatabaseSession):
     stmt = stmt.on_conflict_do_nothing(index_elements=["id"])
     await db.execute(stmt)
     await db.commit()
+    await set_session_validity(session.id, True)
 
 
 @router.get(
@@ -47,6 +53,23 @@ async def resume_session(session_id: str, db: DatabaseSession):
     return None
 
 
+@router.delete(
+    "/{session_id}",
+    summary="Removes a stored session, revoking any tokens issued for it.",
+)
+async def remove_session(session_id: str, db: DatabaseSession, user: UserAuth):
+    if user.session_id != session_id:
+        raise HTTPException(status_code=403, detail="Cannot remove another session.")
+
+    stmt = delete(SessionSchema).where(SessionSchema.id == session_id)
+    await db.execute(stmt)
+    await db.commit()
+    # Outlive any auth payloads other replicas may still hold for this session.
+    await set_session_validity(session_id, False, ttl=config.AUTH_CACHE_TTL)
+    auth.invalidate_session(session_id)
+    await publish_session_revoked(session_id)
+
+
 @router.post(
     "/authorize",
     response_model=auth.Token,
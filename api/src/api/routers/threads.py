@@ -1,6 +1,5 @@
-import asyncio
-from concurrent.futures import ProcessPoolExecutor
-from datetime import datetime
+import json
+from collections.abc import AsyncIterator
 from typing import Annotated
 from typing import Optional
 
@@ -8,29 +7,51 @@ from fastapi import APIRouter
 from fastapi import BackgroundTasks
 from fastapi import Depends
 from fastapi import HTTPException
+from fastapi import Query
+from fastapi import Request
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from redis.exceptions import RedisError
 from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import func
 from sqlalchemy.sql import select
+from sqlalchemy.sql import tuple_
+from sqlalchemy.sql import union_all
 from sqlalchemy.sql import update
 
 from api.auth import AuthPayload
 from api.auth import NotAuthorizedError
 from api.auth import authenticate_request
-from api.data.context import ingest_context
+from api.data.archive import rehydrate_thread
 from api.data.context import search_context
+from api.data.schemas import ArchivedThreadSchema
 from api.data.schemas import MessageSchema
 from api.data.schemas import ThreadSchema
+from api.envelope import ENVELOPE_VERSION
+from api.ingest_queue import enqueue_context
 from api.models import ContextChunk
 from api.models import ContextMessage
 from api.models import ConversationThread
 from api.models import ThreadMessage
+from api.models import ThreadMessageBatch
+from api.pagination import decode_cursor
+from api.pagination import encode_cursor
+from api.utils import AsyncSessionLocal
 from api.utils import database_session
-from api.utils import run_in_executor
+from api.utils import etag_matches
+from api.utils import logger
+from api.utils import make_etag
+from api.workers import crypto_pool
 
 threads_router = APIRouter(tags=["threads"], prefix="/threads")
 
 DatabaseSession = Annotated[AsyncSession, Depends(database_session)]
 UserAuth = Annotated[AuthPayload, Depends(authenticate_request)]
+# Thread IDs end up in the vector store's metadata filters, which are built as SQL text.
+ContextThreadId = Annotated[
+    str | None, Query(max_length=64, pattern=r"^[A-Za-z0-9-]+$")
+]
 
 
 @threads_router.get(
@@ -40,39 +61,91 @@ UserAuth = Annotated[AuthPayload, Depends(authenticate_request)]
 async def get_threads_for_user(
     db: Annotated[AsyncSession, Depends(database_session)], auth: UserAuth
 ) -> Optional[list[str]]:
-    query = await db.execute(
-        select(ThreadSchema).filter(
-            ThreadSchema.user_id == auth.user_key,
-            ThreadSchema.is_deleted.is_(False),
-        )
-    )
+    threads = _user_threads(auth.user_key)
+    query = await db.execute(select(threads.c.id).order_by(threads.c.last_used.desc()))
     results = query.scalars().all()
     if results:
-        return [t.id for t in results]
+        return list(results)
     return None
 
 
+@threads_router.get(
+    "/user/summaries",
+    response_model=list[ConversationThread],
+    summary="Lists a user's conversation threads with summaries, most recent first.",
+    description="""
+    Returns the Thread ID, summary and last used time for a page of threads. When more
+    threads are available, the cursor for the next page is returned in `X-Next-Cursor`.
+    """,
+)
+async def get_thread_summaries_for_user(
+    db: DatabaseSession,
+    auth: UserAuth,
+    response: Response,
+    limit: Annotated[int, Query(ge=1, le=500)] = 100,
+    before: str | None = None,
+):
+    threads = _user_threads(auth.user_key)
+    stmt = select(threads.c.id, threads.c.summary, threads.c.last_used)
+    if before:
+        try:
+            cursor = decode_cursor(before)
+        except ValueError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        thread_key = tuple_(threads.c.last_used, threads.c.id)
+        stmt = stmt.filter(thread_key < tuple_(*cursor))
+
+    stmt = stmt.order_by(threads.c.last_used.desc(), threads.c.id.desc())
+    query = await db.execute(stmt.limit(limit + 1))
+    results = query.all()
+
+    if len(results) > limit:
+        results = results[:limit]
+        edge = results[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(edge.last_used, edge.id)
+
+    if not results:
+        return []
+
+    return await crypto_pool.decrypt_threads(results, auth.data_key)
+
+
 @threads_router.get(
     "/{thread_id}",
-    response_model=Optional[ConversationThread],
+    response_model=ConversationThread,
     summary="Gets a Chat Thread by ID.",
 )
-async def get_thread_by_id(thread_id: str, db: DatabaseSession, auth: UserAuth):
-    query = await db.execute(
-        select(ThreadSchema).filter(
-            ThreadSchema.id == thread_id,
-            ThreadSchema.is_deleted.is_(False),
-        )
+async def get_thread_by_id(
+    thread_id: str,
+    db: DatabaseSession,
+    auth: UserAuth,
+    request: Request,
+    response: Response,
+):
+    stmt = select(ThreadSchema).filter(
+        ThreadSchema.id == thread_id,
+        ThreadSchema.user_id == auth.user_key,
+        ThreadSchema.is_deleted.is_(False),
     )
+    query = await db.execute(stmt)
     result = query.scalar_one_or_none()
-    if result:
-        try:
-            return await run_in_executor(
-                ProcessPoolExecutor(), ConversationThread.decrypt, result, auth.data_key
-            )
-        except NotAuthorizedError as exc:
-            raise HTTPException(status_code=401, detail="Not Authorized") from exc
-    return None
+    if not result and await rehydrate_thread(db, thread_id, auth.user_key):
+        query = await db.execute(stmt)
+        result = query.scalar_one_or_none()
+
+    # Checked before the ETag, so a 304 never confirms another user's thread.
+    if not result:
+        raise HTTPException(status_code=404, detail="Thread not found.")
+
+    etag = make_etag(auth.user_key, result.id, result.last_used)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+
+    response.headers["ETag"] = etag
+    try:
+        return await crypto_pool.decrypt_thread(result, auth.data_key)
+    except NotAuthorizedError as exc:
+        raise HTTPException(status_code=401, detail="Not Authorized") from exc
 
 
 @threads_router.put(
@@ -82,21 +155,12 @@ async def get_thread_by_id(thread_id: str, db: DatabaseSession, auth: UserAuth):
 async def put_thread_save(
     thread: ConversationThread, db: DatabaseSession, auth: UserAuth
 ):
-    model_dict = await run_in_executor(
-        ProcessPoolExecutor(), thread.encrypt, auth.data_key
-    )
-    stmt = pg_insert(ThreadSchema).values(
-        user_id=auth.user_key,
-        **model_dict,
-    )
-    stmt = stmt.on_conflict_do_update(
-        index_elements=["id"],
-        set_={
-            "summary": stmt.excluded.summary,
-            "last_used": stmt.excluded.last_used,
-        },
-    )
-    await db.execute(stmt)
+    owner = await _get_thread_owner(thread.id, auth.user_key, db, include_deleted=True)
+    if owner and owner != auth.user_key:
+        raise HTTPException(status_code=401, detail="Not Authorized")
+
+    model_dict = await crypto_pool.run(thread.encrypt, auth.data_key)
+    await db.execute(_upsert_thread(model_dict, auth.user_key))
     await db.commit()
 
 
@@ -104,42 +168,166 @@ async def put_thread_save(
     "/{thread_id}/delete", summary="Delets a Chat Thread for a user to memory."
 )
 async def put_thread_delete(thread_id: str, db: DatabaseSession, auth: UserAuth):
-    stmt = (
-        update(ThreadSchema)
-        .where(ThreadSchema.id == thread_id, ThreadSchema.user_id == auth.user_key)
-        .values(is_deleted=True)
-    )
-    await db.execute(stmt)
+    for schema in (ThreadSchema, ArchivedThreadSchema):
+        stmt = (
+            update(schema)
+            .where(schema.id == thread_id, schema.user_id == auth.user_key)
+            .values(is_deleted=True)
+        )
+        await db.execute(stmt)
     await db.commit()
 
 
 @threads_router.get(
     "/{thread_id}/messages",
     response_model=list[ThreadMessage],
-    summary="Gets all messages within a single Thread.",
+    summary="Gets messages within a single Thread, oldest first.",
+    description="""
+    Without a limit, returns every message in the Thread. With a limit, returns the
+    most recent page, or the page before/after the given cursor. When more messages
+    are available, the cursor for the next page is returned in `X-Next-Cursor`.
+    """,
 )
-async def get_thread_messages(thread_id: str, db: DatabaseSession, auth: UserAuth):
-    query = await db.execute(
-        select(MessageSchema).filter(MessageSchema.thread_id == thread_id)
-    )
-    results = query.scalars().all()
+async def get_thread_messages(
+    thread_id: str,
+    db: DatabaseSession,
+    auth: UserAuth,
+    request: Request,
+    response: Response,
+    background_tasks: BackgroundTasks,
+    limit: Annotated[int | None, Query(ge=1, le=1000)] = None,
+    before: str | None = None,
+    after: str | None = None,
+):
+    if before and after:
+        raise HTTPException(
+            status_code=400, detail="Only one of before or after may be provided."
+        )
+
+    try:
+        cursor = decode_cursor(before or after) if before or after else None
+    except ValueError as exc:
+        raise HTTPException(status_code=400, detail=str(exc)) from exc
+
+    watermark = await _get_messages_watermark(thread_id, auth.user_key, db)
+    if not watermark and await rehydrate_thread(db, thread_id, auth.user_key):
+        watermark = await _get_messages_watermark(thread_id, auth.user_key, db)
+
+    if not watermark:
+        raise HTTPException(status_code=404, detail="Thread not found.")
+
+    etag = make_etag(auth.user_key, thread_id, *watermark, limit, before, after)
+    if etag_matches(request, etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    message_key = tuple_(MessageSchema.timestamp, MessageSchema.id)
+    descending = limit is not None and not after
+
+    stmt = select(MessageSchema).filter(MessageSchema.thread_id == thread_id)
+    if before:
+        stmt = stmt.filter(message_key < tuple_(*cursor))
+    if after:
+        stmt = stmt.filter(message_key > tuple_(*cursor))
+
+    if descending:
+        stmt = stmt.order_by(MessageSchema.timestamp.desc(), MessageSchema.id.desc())
+    else:
+        stmt = stmt.order_by(MessageSchema.timestamp.asc(), MessageSchema.id.asc())
+
+    if limit:
+        stmt = stmt.limit(limit + 1)
+
+    query = await db.execute(stmt)
+    results = list(query.scalars().all())
+
+    if limit and len(results) > limit:
+        results = results[:limit]
+        edge = results[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(edge.timestamp, edge.id)
+
+    if descending:
+        results.reverse()
+
+    if any(m.encoding < ENVELOPE_VERSION for m in results):
+        background_tasks.add_task(_reencode_thread_messages, thread_id, auth.data_key)
+
     if results:
         try:
-            with ProcessPoolExecutor() as executor:
-                decrypted_results = await asyncio.gather(
-                    *(
-                        run_in_executor(
-                            executor, ThreadMessage.decrypt, m, auth.data_key
-                        )
-                        for m in results
-                    )
-                )
-                return decrypted_results
+            return await crypto_pool.decrypt_messages(results, auth.data_key)
         except NotAuthorizedError as exc:
             raise HTTPException(status_code=401, detail="Not Authorized") from exc
     return []
 
 
+@threads_router.get(
+    "/{thread_id}/messages/export",
+    response_class=StreamingResponse,
+    summary="Streams all messages within a single Thread as NDJSON, oldest first.",
+    description="""
+    Messages are read with a server-side cursor and decrypted in chunks, so memory use
+    is bounded by the chunk size rather than the length of the Thread. The first chunk
+    is decrypted before the response starts. If a later chunk cannot be decrypted, the
+    stream ends with an `{"error": ...}` record instead of a message.
+    """,
+)
+async def get_thread_messages_export(
+    thread_id: str, db: DatabaseSession, auth: UserAuth
+):
+    owner = await _get_thread_owner(thread_id, auth.user_key, db)
+    if not owner:
+        raise HTTPException(status_code=404, detail="Thread not found.")
+    if owner != auth.user_key:
+        raise HTTPException(status_code=401, detail="Not Authorized")
+
+    stream = _stream_thread_messages(thread_id, auth.data_key)
+    try:
+        first = await anext(stream)
+    except StopAsyncIteration:
+        first = ""
+    except NotAuthorizedError as exc:
+        raise HTTPException(status_code=401, detail="Not Authorized") from exc
+
+    return StreamingResponse(
+        _prepend_chunk(first, stream),
+        media_type="application/x-ndjson",
+    )
+
+
+async def _prepend_chunk(first: str, stream: AsyncIterator[str]):
+    try:
+        yield first
+        async for chunk in stream:
+            yield chunk
+    finally:
+        await stream.aclose()
+
+
+async def _stream_thread_messages(thread_id: str, data_key: str):
+    stmt = (
+        select(MessageSchema)
+        .filter(MessageSchema.thread_id == thread_id)
+        .order_by(MessageSchema.timestamp.asc(), MessageSchema.id.asc())
+        .execution_options(yield_per=crypto_pool.chunk_size)
+    )
+    started = False
+    async with AsyncSessionLocal() as db:
+        results = await db.stream_scalars(stmt)
+        async for chunk in results.partitions():
+            try:
+                messages = await crypto_pool.decrypt_messages(chunk, data_key)
+            except NotAuthorizedError:
+                if not started:
+                    raise
+                # The status line is already sent, so the failure has to be in-band.
+                logger.warning(f"Aborted export of thread {thread_id}: not authorized.")
+                yield f"{json.dumps({'error': 'Not Authorized'})}\n"
+                return
+
+            started = True
+            yield "".join(f"{m.model_dump_json()}\n" for m in messages)
+
+
 @threads_router.get(
     "/{thread_id}/messages/{message_id}",
     response_model=Optional[ThreadMessage],
@@ -148,6 +336,12 @@ async def get_thread_messages(thread_id: str, db: DatabaseSession, auth: UserAut
 async def get_message_by_id(
     thread_id: str, message_id: str, db: DatabaseSession, auth: UserAuth
 ):
+    owner = await _get_thread_owner(thread_id, auth.user_key, db)
+    if not owner:
+        raise HTTPException(status_code=404, detail="Thread not found.")
+    if owner != auth.user_key:
+        raise HTTPException(status_code=401, detail="Not Authorized")
+
     query = await db.execute(
         select(MessageSchema).filter(
             MessageSchema.id == message_id,
@@ -157,9 +351,7 @@ async def get_message_by_id(
     result = query.scalar_one_or_none()
     if result:
         try:
-            return await run_in_executor(
-                ProcessPoolExecutor(), ThreadMessage.decrypt, result, auth.data_key
-            )
+            return await crypto_pool.decrypt_message(result, auth.data_key)
         except NotAuthorizedError as exc:
             raise HTTPException(status_code=401, detail="Not Authorized") from exc
     return None
@@ -171,28 +363,154 @@ async def get_message_by_id(
 async def put_thread_message(
     thread_id: str, message: ThreadMessage, db: DatabaseSession, auth: UserAuth
 ):
-    thread = await get_thread_by_id(thread_id, db, auth)
-    if not thread:
+    owner = await _get_thread_owner(thread_id, auth.user_key, db)
+    if not owner:
         raise HTTPException(
             status_code=400, detail="A thread must exist before saving a message."
         )
-    encrypted_message = await run_in_executor(
-        ProcessPoolExecutor(), message.encrypt, auth.data_key
+    if owner != auth.user_key:
+        raise HTTPException(status_code=401, detail="Not Authorized")
+
+    encrypted_message = await crypto_pool.run(message.encrypt, auth.data_key)
+    await db.execute(_upsert_messages(thread_id, [encrypted_message]))
+    await db.commit()
+
+
+@threads_router.put(
+    "/{thread_id}/messages/batch",
+    summary="Saves a Chat Thread and a batch of Chat Messages in one transaction.",
+)
+async def put_thread_messages_batch(
+    thread_id: str, batch: ThreadMessageBatch, db: DatabaseSession, auth: UserAuth
+):
+    if batch.thread and batch.thread.id != thread_id:
+        raise HTTPException(status_code=400, detail="Thread ID does not match.")
+
+    owner = await _get_thread_owner(thread_id, auth.user_key, db, include_deleted=True)
+    if owner and owner != auth.user_key:
+        raise HTTPException(status_code=401, detail="Not Authorized")
+    if not owner and not batch.thread:
+        raise HTTPException(
+            status_code=400, detail="A thread must exist before saving a message."
+        )
+
+    if batch.thread:
+        model_dict = await crypto_pool.run(batch.thread.encrypt, auth.data_key)
+        await db.execute(_upsert_thread(model_dict, auth.user_key))
+
+    if batch.messages:
+        encrypted_messages = await crypto_pool.encrypt_messages(
+            thread_id, batch.messages, auth.data_key
+        )
+        await db.execute(_upsert_messages(thread_id, encrypted_messages))
+
+    await db.commit()
+
+
+async def _get_messages_watermark(
+    thread_id: str, user_key: str, db: AsyncSession
+) -> tuple | None:
+    # updated_at moves when an existing message is overwritten, which neither the
+    # count nor the latest timestamp would show.
+    query = await db.execute(
+        select(
+            ThreadSchema.last_used,
+            func.count(MessageSchema.id),
+            func.max(MessageSchema.timestamp),
+            func.max(MessageSchema.updated_at),
+        )
+        .select_from(ThreadSchema)
+        .outerjoin(MessageSchema, MessageSchema.thread_id == ThreadSchema.id)
+        .filter(ThreadSchema.id == thread_id, ThreadSchema.user_id == user_key)
+        .group_by(ThreadSchema.last_used)
     )
+    return query.one_or_none()
+
+
+async def _get_thread_owner(
+    thread_id: str, user_key: str, db: AsyncSession, include_deleted: bool = False
+) -> str | None:
+    # Archived threads count as existing, so writes never create a hot row that
+    # collides with an archived copy. Only the caller's own threads are rehydrated.
+    for schema in (ThreadSchema, ArchivedThreadSchema):
+        stmt = select(schema.user_id).filter(schema.id == thread_id)
+        if not include_deleted:
+            stmt = stmt.filter(schema.is_deleted.is_(False))
+
+        query = await db.execute(stmt)
+        owner = query.scalar_one_or_none()
+        if owner:
+            break
 
+    if owner == user_key and schema is ArchivedThreadSchema:
+        await rehydrate_thread(db, thread_id, user_key, include_deleted)
+    return owner
+
+
+def _user_threads(user_key: str):
+    return union_all(
+        *(
+            select(schema.id, schema.summary, schema.last_used).filter(
+                schema.user_id == user_key,
+                schema.is_deleted.is_(False),
+            )
+            for schema in (ThreadSchema, ArchivedThreadSchema)
+        )
+    ).subquery()
+
+
+def _upsert_thread(model_dict: dict, user_key: str):
+    stmt = pg_insert(ThreadSchema).values(
+        user_id=user_key,
+        **model_dict,
+    )
+    return stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={
+            "summary": stmt.excluded.summary,
+            "last_used": stmt.excluded.last_used,
+        },
+    )
+
+
+def _upsert_messages(thread_id: str, encrypted_messages: list[dict]):
     stmt = pg_insert(MessageSchema).values(
-        thread_id=thread_id,
-        **encrypted_message,
+        [{**m, "thread_id": thread_id} for m in encrypted_messages]
     )
-    stmt = stmt.on_conflict_do_update(
+    return stmt.on_conflict_do_update(
         index_elements=["id"],
         set_={
             "role": stmt.excluded.role,
             "content": stmt.excluded.content,
+            "encoding": stmt.excluded.encoding,
+            "updated_at": func.now(),
         },
     )
-    await db.execute(stmt)
-    await db.commit()
+
+
+async def _reencode_thread_messages(thread_id: str, data_key: str):
+    stmt = select(MessageSchema.id, MessageSchema.content).filter(
+        MessageSchema.thread_id == thread_id,
+        MessageSchema.encoding < ENVELOPE_VERSION,
+    )
+    async with AsyncSessionLocal() as db:
+        query = await db.execute(stmt)
+        rows = [tuple(r) for r in query.all()]
+        if not rows:
+            return
+
+        reencoded = await crypto_pool.reencode_messages(rows, data_key)
+        if reencoded:
+            # Skip rows rewritten by a newer save since they were read.
+            await db.execute(
+                update(MessageSchema)
+                .where(MessageSchema.encoding < ENVELOPE_VERSION)
+                .execution_options(synchronize_session=None),
+                reencoded,
+            )
+            await db.commit()
+
+    logger.info(f"Re-encoded {len(reencoded)} messages in thread {thread_id}.")
 
 
 @threads_router.post(
@@ -200,17 +518,28 @@ async def put_thread_message(
     summary="Stores conversation context in memory, and vectorizes them for later use.",
     description="""
     Allows AI agents to store external context in memory by Thread ID, and vectorized
-    for later use. Vectorization is handled in the background in FastAPI.
+    for later use. Messages are queued and vectorized in batches by the ingest worker.
     """,
     status_code=202,
 )
-def post_context_save(
-    background_tasks: BackgroundTasks, messages: list[ContextMessage]
+async def post_context_save(
+    messages: list[ContextMessage], auth: UserAuth, thread_id: ContextThreadId = None
 ) -> str | None:
     in_messages = [
-        m for m in messages if m.content and m.agent not in ["Supervisor", "Archivist"]
+        m.model_copy(update={"user_key": auth.user_key, "thread_id": thread_id})
+        for m in messages
+        if m.content and m.agent not in ["Supervisor", "Archivist"]
     ]
-    background_tasks.add_task(ingest_context, in_messages)
+    if not in_messages:
+        return
+
+    try:
+        await enqueue_context(in_messages)
+    except RedisError as exc:
+        logger.error(f"Failed to queue context for ingestion: {exc}")
+        raise HTTPException(
+            status_code=503, detail="Ingest queue unavailable."
+        ) from exc
     return
 
 
@@ -219,17 +548,14 @@ def post_context_save(
     response_model=list[ContextChunk],
     summary="Gets conversation context from memory, by vector search.",
     description="""
-    Allows AI agents to retrieve stored context in memory.
+    Allows AI agents to retrieve the user's stored context in memory, optionally
+    limited to a single Thread ID.
     """,
 )
-def get_context_search(query: str, top_k: int = 10):
-    results = search_context(query, top_k)
-
-    return [
-        ContextChunk(
-            timestamp=datetime.fromisoformat(r.metadata["timestamp"]),
-            agent=r.metadata["agent"],
-            content=r.text,
-        )
-        for r in results
-    ]
+async def get_context_search(
+    query: str,
+    auth: UserAuth,
+    thread_id: ContextThreadId = None,
+    top_k: Annotated[int, Query(ge=1, le=50)] = 10,
+) -> list[ContextChunk]:
+    return await search_context(query, auth.user_key, thread_id, top_k)
@@ -0,0 +1,66 @@
+import asyncio
+from collections.abc import Callable
+
+import api.config as config
+from api.utils import cache
+from api.utils import logger
+from redis.exceptions import RedisError
+
+__all__ = [
+    "get_session_validity",
+    "listen_session_revocations",
+    "publish_session_revoked",
+    "set_session_validity",
+]
+
+SESSION_CACHE_PREFIX = "api:sessions"
+SESSION_REVOKED_CHANNEL = "api:sessions:revoked"
+
+
+def _session_cache_key(session_id: str) -> str:
+    return f"{SESSION_CACHE_PREFIX}:{session_id}"
+
+
+async def get_session_validity(session_id: str) -> bool | None:
+    try:
+        cached = await cache.get(_session_cache_key(session_id))
+    except RedisError as e:
+        logger.warning(f"Session cache unavailable: {e}")
+        return None
+
+    if cached is None:
+        return None
+    return cached == "1"
+
+
+async def set_session_validity(session_id: str, is_valid: bool, ttl: int | None = None):
+    if not ttl:
+        ttl = (
+            config.SESSION_CACHE_TTL if is_valid else config.SESSION_CACHE_NEGATIVE_TTL
+        )
+    try:
+        await cache.set(_session_cache_key(session_id), int(is_valid), ex=ttl)
+    except RedisError as e:
+        logger.warning(f"Session cache unavailable: {e}")
+
+
+async def publish_session_revoked(session_id: str):
+    try:
+        await cache.publish(SESSION_REVOKED_CHANNEL, session_id)
+    except RedisError as e:
+        logger.warning(f"Session cache unavailable: {e}")
+
+
+# Every worker keeps its own auth cache, so revocations are broadcast and each worker
+# evicts the session locally instead of waiting for its cached payloads to expire.
+async def listen_session_revocations(on_revoked: Callable[[str], object]):
+    while True:
+        try:
+            async with cache.pubsub() as pubsub:
+                await pubsub.subscribe(SESSION_REVOKED_CHANNEL)
+                async for message in pubsub.listen():
+                    if message["type"] == "message":
+                        on_revoked(message["data"])
+        except RedisError as e:
+            logger.warning(f"Session revocation channel unavailable: {e}")
+            await asyncio.sleep(5)
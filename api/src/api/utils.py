@@ -1,31 +1,22 @@
 import asyncio
+import hashlib
 import logging
-import os
-from langchain_experimental.text_splitter import SemanticChunker
-from langchain_openai import OpenAIEmbeddings
+
+import api.config as config
+from fastapi import Request
+from redis.asyncio import Redis as AsyncRedis
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.ext.asyncio import create_async_engine
 from sqlalchemy.orm import sessionmaker
 
-import api.config as config
+from shared.engine import create_engine
 
 logger = logging.getLogger("uvicorn.error")
 
-text_embed = OpenAIEmbeddings(
-    model=config.EMBED_MODEL,
-    dimensions=config.EMBED_DIM,
-    api_key=os.getenv("OPENAI_API_KEY"),
-)
-
-text_chunk = SemanticChunker(
-    embeddings=text_embed,
-    breakpoint_threshold_type="standard_deviation",
-    breakpoint_threshold_amount=0.5,
-)
-
-engine = create_async_engine(f"postgresql+asyncpg://{config.POSTGRES_URL}")
+engine = create_engine(f"postgresql+asyncpg://{config.POSTGRES_URL}")
 AsyncSessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
+cache = AsyncRedis(host=config.REDIS_HOST, port=6379, decode_responses=True)
+
 
 async def database_session():
     async with AsyncSessionLocal() as session:
@@ -35,3 +26,17 @@ async def database_session():
 async def run_in_executor(executor, func, *args):
     loop = asyncio.get_event_loop()
     return await loop.run_in_executor(executor, func, *args)
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.sha256("|".join(str(p) for p in parts).encode("utf-8"))
+    return f'W/"{digest.hexdigest()[:32]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags
@@ -0,0 +1,159 @@
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+from itertools import batched
+
+import api.config as config
+from api.auth import NotAuthorizedError
+from api.auth import bulk_decrypt
+from api.auth import bulk_encrypt
+from api.data.schemas import MessageSchema
+from api.envelope import ENVELOPE_VERSION
+from api.models import ConversationThread
+from api.models import ThreadMessage
+from api.utils import logger
+from api.utils import run_in_executor
+
+__all__ = ["CryptoWorkerPool", "crypto_pool"]
+
+MESSAGE_FIELDS = ("id", "thread_id", "role", "content", "timestamp", "model")
+THREAD_FIELDS = ("id", "summary", "last_used")
+
+
+def _decrypt_rows(
+    rows: list[tuple],
+    key: bytes,
+    fields: tuple[str, ...],
+    field: str,
+    skip_failed: bool = False,
+) -> list[dict]:
+    records = [dict(zip(fields, row, strict=True)) for row in rows]
+    values, failed = bulk_decrypt(key, [r[field] for r in records])
+    if failed and not skip_failed:
+        raise NotAuthorizedError(f"Failed to decrypt {len(failed)} record(s).")
+
+    failed = set(failed)
+    for record, value in zip(records, values, strict=True):
+        record[field] = value
+    return [record for i, record in enumerate(records) if i not in failed]
+
+
+def decrypt_message_rows(rows: list[tuple], key: bytes) -> list[dict]:
+    return _decrypt_rows(rows, key, MESSAGE_FIELDS, "content")
+
+
+def decrypt_message_row(row: tuple, key: bytes) -> dict:
+    (message,) = _decrypt_rows([row], key, MESSAGE_FIELDS, "content")
+    return message
+
+
+def decrypt_thread_row(row: tuple, key: bytes) -> dict:
+    (thread,) = _decrypt_rows([row], key, THREAD_FIELDS, "summary")
+    return thread
+
+
+def decrypt_thread_rows(rows: list[tuple], key: bytes) -> list[dict]:
+    # One unreadable summary should not hide the rest of the user's threads.
+    return _decrypt_rows(rows, key, THREAD_FIELDS, "summary", skip_failed=True)
+
+
+def encrypt_message_rows(rows: list[tuple], key: bytes) -> list[dict]:
+    messages = [dict(zip(MESSAGE_FIELDS, row, strict=True)) for row in rows]
+    contents = bulk_encrypt(key, [m["content"] for m in messages])
+
+    for message, content in zip(messages, contents, strict=True):
+        message["content"] = content
+        message["encoding"] = ENVELOPE_VERSION
+    return messages
+
+
+def reencode_message_rows(rows: list[tuple], key: bytes) -> list[dict]:
+    contents, failed = bulk_decrypt(key, [content for _, content in rows])
+    failed = set(failed)
+
+    ids = [row[0] for i, row in enumerate(rows) if i not in failed]
+    contents = [c for i, c in enumerate(contents) if i not in failed]
+    return [
+        {"id": message_id, "content": content, "encoding": ENVELOPE_VERSION}
+        for message_id, content in zip(ids, bulk_encrypt(key, contents), strict=True)
+    ]
+
+
+class CryptoWorkerPool:
+    def __init__(self, max_workers: int | None = None, chunk_size: int = 200):
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self._executor = None
+
+    @property
+    def executor(self) -> ProcessPoolExecutor:
+        if not self._executor:
+            self.start()
+        return self._executor
+
+    def start(self):
+        if not self._executor:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+    def stop(self):
+        if self._executor:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, func, *args):
+        return await run_in_executor(self.executor, func, *args)
+
+    async def _run_chunked(self, func, rows: list[tuple], key: bytes) -> list[dict]:
+        chunks = await asyncio.gather(
+            *(
+                self.run(func, list(chunk), key)
+                for chunk in batched(rows, self.chunk_size)
+            )
+        )
+        return [row for chunk in chunks for row in chunk]
+
+    async def decrypt_messages(
+        self, messages: list[MessageSchema], key: bytes
+    ) -> list[ThreadMessage]:
+        rows = [tuple(getattr(m, f) for f in MESSAGE_FIELDS) for m in messages]
+        decrypted = await self._run_chunked(decrypt_message_rows, rows, key)
+        return [ThreadMessage.model_validate(m) for m in decrypted]
+
+    async def decrypt_message(
+        self, message: MessageSchema, key: bytes
+    ) -> ThreadMessage:
+        # Only plain tuples cross the process boundary, never ORM instance state.
+        row = tuple(getattr(message, f) for f in MESSAGE_FIELDS)
+        decrypted = await self.run(decrypt_message_row, row, key)
+        return ThreadMessage.model_validate(decrypted)
+
+    async def reencode_messages(self, rows: list[tuple], key: bytes) -> list[dict]:
+        return await self._run_chunked(reencode_message_rows, rows, key)
+
+    async def decrypt_threads(
+        self, threads: list[tuple], key: bytes
+    ) -> list[ConversationThread]:
+        rows = [tuple(t) for t in threads]
+        decrypted = await self._run_chunked(decrypt_thread_rows, rows, key)
+        if len(decrypted) < len(rows):
+            skipped = {row[0] for row in rows} - {t["id"] for t in decrypted}
+            logger.error(f"Skipped threads with undecryptable summaries: {skipped}")
+        return [ConversationThread.model_validate(t) for t in decrypted]
+
+    async def decrypt_thread(self, thread, key: bytes) -> ConversationThread:
+        row = tuple(getattr(thread, f) for f in THREAD_FIELDS)
+        decrypted = await self.run(decrypt_thread_row, row, key)
+        return ConversationThread.model_validate(decrypted)
+
+    async def encrypt_messages(
+        self, thread_id: str, messages: list[ThreadMessage], key: bytes
+    ) -> list[dict]:
+        rows = [
+            (m.id, thread_id, m.role, m.content, m.timestamp, m.model) for m in messages
+        ]
+        return await self._run_chunked(encrypt_message_rows, rows, key)
+
+
+crypto_pool = CryptoWorkerPool(
+    max_workers=config.CRYPTO_WORKERS,
+    chunk_size=config.CRYPTO_CHUNK_SIZE,
+)
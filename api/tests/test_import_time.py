@@ -0,0 +1,49 @@
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+API_SRC = Path(__file__).resolve().parents[1] / "src"
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+IMPORT_BUDGET_US = int(os.getenv("API_IMPORT_BUDGET_US", 1_500_000))
+
+IMPORTTIME_LINE = re.compile(r"import time:\s+\d+ \|\s+(\d+) \|\s*(\S+)")
+
+HEAVY_MODULES = ["langchain", "langchain_openai", "llama_index"]
+
+
+def import_api(code: str) -> subprocess.CompletedProcess:
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join([str(API_SRC), str(REPO_ROOT)]),
+    }
+    return subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+        timeout=120,
+        check=True,
+    )
+
+
+def test_import_api_main_within_budget():
+    result = import_api("import api.main")
+
+    cumulative = {
+        match.group(2): int(match.group(1))
+        for match in map(IMPORTTIME_LINE.match, result.stderr.splitlines())
+        if match
+    }
+    assert cumulative["api.main"] < IMPORT_BUDGET_US
+
+
+def test_import_api_main_skips_heavy_libraries():
+    result = import_api(
+        "import sys, api.main; "
+        f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))"
+    )
+
+    assert result.stdout.strip() == ""
@@ -0,0 +1,57 @@
+import api.data.context as context
+import pytest
+from api.data.embeddings import HashedNgramEmbedding
+from api.models import ContextMessage
+from llama_index.core.storage.docstore import SimpleDocumentStore
+from llama_index.core.vector_stores import SimpleVectorStore
+
+
+class FlakyEmbedding(HashedNgramEmbedding):
+    failures: int = 1
+
+    def _get_text_embeddings(self, texts: list[str]) -> list[list[float]]:
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("embedding service unavailable")
+        return super()._get_text_embeddings(texts)
+
+
+@pytest.fixture
+def stores(monkeypatch):
+    docstore = SimpleDocumentStore()
+    vector_store = SimpleVectorStore()
+    embedder = FlakyEmbedding(embed_dim=64)
+
+    monkeypatch.setattr(context, "get_document_store", lambda: docstore)
+    monkeypatch.setattr(context, "get_vector_store", lambda: vector_store)
+    monkeypatch.setattr(context, "get_text_embedder", lambda: embedder)
+    context.get_ingestion_pipeline.cache_clear()
+    context.get_splitter.cache_clear()
+    yield docstore, vector_store
+    context.get_ingestion_pipeline.cache_clear()
+    context.get_splitter.cache_clear()
+
+
+def test_failed_ingest_is_retried(stores):
+    docstore, vector_store = stores
+    messages = [
+        ContextMessage(
+            agent="researcher",
+            content="Quarterly revenue grew in every region.",
+            user_key="user-1",
+            thread_id="thread-1",
+        )
+    ]
+
+    with pytest.raises(RuntimeError):
+        context.ingest_context(messages)
+    assert docstore.get_all_document_hashes() == {}
+    assert vector_store.data.embedding_dict == {}
+
+    context.ingest_context(messages)
+    assert len(vector_store.data.embedding_dict) == 1
+    assert len(docstore.get_all_document_hashes()) == 1
+
+    # Unchanged content is skipped once it has been stored.
+    context.ingest_context(messages)
+    assert len(vector_store.data.embedding_dict) == 1
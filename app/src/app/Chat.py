@@ -29,6 +29,7 @@ def invoke_graph():
     state = ChatState(
         loop_count=0,
         thread_id=st.session_state.current_thread.id,
+        api_headers=config.authorization_header(),
         agent=AgentConfig(
             model=st.session_state.ai_model, temp=st.session_state.ai_temp
         ),
@@ -189,6 +190,15 @@ if st.session_state.user.authorized:
         if st.session_state.current_thread.summary:
             st.header(f"{st.session_state.current_thread.summary}")
 
+        if st.session_state.current_thread.has_earlier_messages:
+            st.button(
+                label="Load earlier messages",
+                key="load_earlier_messages",
+                type="secondary",
+                on_click=st.session_state.current_thread.get_earlier_messages,
+                use_container_width=True,
+            )
+
         for message in st.session_state.current_thread:
             with st.chat_message(message.role):
                 st.write(message.content)
@@ -241,12 +251,14 @@ if st.session_state.user.authorized:
         )
         st.session_state.current_thread.append(new_asst_message)
 
-        st.session_state.current_thread.save()
-        new_user_message.save(st.session_state.current_thread.id)
-        new_asst_message.save(st.session_state.current_thread.id)
+        st.session_state.current_thread.save_messages(
+            [new_user_message, new_asst_message]
+        )
 
         if response["workspace"]:
-            ContextMessage.save(response["workspace"])
+            ContextMessage.save(
+                response["workspace"], st.session_state.current_thread.id
+            )
 
         if st.session_state.current_thread.id not in list(
             st.session_state.conversations.keys()
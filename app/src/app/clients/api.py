@@ -0,0 +1,34 @@
+from typing import Any
+
+import requests
+import streamlit as st
+from config import authorization_header
+from requests.structures import CaseInsensitiveDict
+
+
+def conditional_get(url: str, params: dict | None = None) -> tuple[Any, dict]:
+    etag_cache = st.session_state.etag_cache = st.session_state.get(
+        "etag_cache", dict()
+    )
+    cache_key = (url, tuple(sorted((params or {}).items())))
+    cached = etag_cache.get(cache_key)
+
+    headers = authorization_header()
+    if cached:
+        headers = {**headers, "If-None-Match": cached["etag"]}
+
+    response = requests.get(url=url, headers=headers, params=params)
+    if response.status_code == 304 and cached:
+        return cached["data"], cached["headers"]
+
+    response.raise_for_status()
+    data = response.json()
+
+    etag = response.headers.get("ETag")
+    if etag:
+        etag_cache[cache_key] = {
+            "etag": etag,
+            "data": data,
+            "headers": CaseInsensitiveDict(response.headers),
+        }
+    return data, response.headers
@@ -10,6 +10,8 @@ DEFAULT_MODEL = "google/gemini-flash-1.5"
 DEFAULT_TEMP = 0.2
 MAX_TOKEN_VALUES = [512, 1024, 2048, 4096]
 DEFAULT_MAX_TOKENS = 2048
+MESSAGE_PAGE_SIZE = 50
+THREAD_PAGE_SIZE = 100
 
 API_ENDPOINT = "http://api:8000"
 
@@ -1,5 +1,6 @@
 import requests
 from config import API_ENDPOINT
+from langchain_core.tools import InjectedToolArg
 from langchain_core.tools import tool
 from typing_extensions import Annotated
 
@@ -32,6 +33,7 @@ class ArchivistAgent(BaseAgent):
     def search_archive(
         query: Annotated[str, "The query that to search for in the archive."],
         reason: Annotated[str, "Explain the reason for choosing this tool."],
+        state_args: Annotated[dict, InjectedToolArg],
     ) -> str:
         """
         Query the historical archive for information. This is information that other
@@ -40,6 +42,7 @@ class ArchivistAgent(BaseAgent):
 
         search_request = requests.get(
             url=f"{API_ENDPOINT}/threads/context/search",
+            headers=state_args["api_headers"],
             params={"query": query, "top_k": 6},
         )
         search_request.raise_for_status()
@@ -13,6 +13,8 @@ class AgentConfig(TypedDict):
 
 class ChatState(TypedDict):
     loop_count: int = 0
+    thread_id: str
+    api_headers: dict
     agent: AgentConfig | dict
     conversation: list[ThreadMessage]
     workspace: list[BaseMessage] = []
@@ -29,7 +29,7 @@ class ThreadMessage(models.ThreadMessage):
 
 class ContextMessage(models.ContextMessage):
     @classmethod
-    def save(cls, messages: list[dict]):
+    def save(cls, messages: list[dict], thread_id: str):
         msgs = [
             ContextMessage(
                 content=m["content"],
@@ -39,6 +39,8 @@ class ContextMessage(models.ContextMessage):
         ]
         put_context = requests.post(
             url=f"{API_ENDPOINT}/threads/context/save",
+            headers=authorization_header(),
+            params={"thread_id": thread_id},
             data=json.dumps([m.model_dump() for m in msgs]),
         )
         put_context.raise_for_status()
@@ -6,8 +6,12 @@ from typing import Optional
 import requests
 from clients.ai import OpenRouterModels
 from clients.ai import get_client
+from clients.api import conditional_get
 from config import API_ENDPOINT
+from config import MESSAGE_PAGE_SIZE
+from config import THREAD_PAGE_SIZE
 from config import authorization_header
+from pydantic import PrivateAttr
 
 import shared.models as models
 
@@ -31,6 +35,12 @@ class ConversationThread(models.ConversationThread):
     messages: list[ThreadMessage]
     summary: Optional[str]
 
+    _messages_cursor: str | None = PrivateAttr(default=None)
+
+    @property
+    def has_earlier_messages(self) -> bool:
+        return self._messages_cursor is not None
+
     @classmethod
     def create(cls) -> "ConversationThread":
         return cls(
@@ -56,14 +66,43 @@ class ConversationThread(models.ConversationThread):
             return thread_ids
         return None
 
+    @classmethod
+    def get_summaries_for_user(cls) -> list["ConversationThread"] | None:
+        threads_data = []
+        params = {"limit": THREAD_PAGE_SIZE}
+        while True:
+            get_threads = requests.get(
+                url=f"{API_ENDPOINT}/threads/user/summaries",
+                headers=authorization_header(),
+                params=params,
+            )
+            try:
+                get_threads.raise_for_status()
+                threads_data.extend(get_threads.json())
+            except requests.exceptions.HTTPError:
+                return None
+            except json.JSONDecodeError:
+                return None
+
+            cursor = get_threads.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+            params = {"limit": THREAD_PAGE_SIZE, "before": cursor}
+
+        return [
+            cls(
+                id=t["id"],
+                summary=t["summary"],
+                last_used=datetime.fromisoformat(t["last_used"]),
+                messages=[],
+            )
+            for t in threads_data
+        ]
+
     @classmethod
     def get_from_id(cls, thread_id: str) -> Optional["ConversationThread"]:
-        get_thread_data = requests.get(
-            url=f"{API_ENDPOINT}/threads/{thread_id}", headers=authorization_header()
-        )
         try:
-            get_thread_data.raise_for_status()
-            thread_data = get_thread_data.json()
+            thread_data, _ = conditional_get(url=f"{API_ENDPOINT}/threads/{thread_id}")
         except requests.exceptions.HTTPError:
             return None
         except json.JSONDecodeError:
@@ -80,23 +119,40 @@ class ConversationThread(models.ConversationThread):
                 )
             )
 
-    def get_messages(self) -> list[ThreadMessage]:
-        get_thread_messages = requests.get(
-            url=f"{API_ENDPOINT}/threads/{self.id}/messages",
-            headers=authorization_header(),
-        )
+    def _fetch_messages(self, **params) -> list[ThreadMessage] | None:
         try:
-            get_thread_messages.raise_for_status()
-            thread_messages = get_thread_messages.json()
+            thread_messages, headers = conditional_get(
+                url=f"{API_ENDPOINT}/threads/{self.id}/messages",
+                params={"limit": MESSAGE_PAGE_SIZE, **params},
+            )
         except requests.exceptions.HTTPError:
             return None
         except json.JSONDecodeError:
             return None
         else:
-            msgs = [ThreadMessage(**m) for m in thread_messages]
-            msgs.sort(key=lambda x: x.timestamp)
+            self._messages_cursor = headers.get("X-Next-Cursor")
+            return [ThreadMessage(**m) for m in thread_messages]
+
+    def get_messages(self) -> list[ThreadMessage]:
+        msgs = self._fetch_messages()
+        if msgs is not None:
             self.messages = msgs
-            return msgs
+        return msgs
+
+    def get_earlier_messages(self) -> list[ThreadMessage]:
+        if not self._messages_cursor:
+            return []
+
+        msgs = self._fetch_messages(before=self._messages_cursor)
+        if msgs:
+            self.messages = msgs + self.messages
+        return msgs
+
+    def get_all_messages(self) -> list[ThreadMessage]:
+        while self.has_earlier_messages:
+            if not self.get_earlier_messages():
+                break
+        return self.messages
 
     def delete(self):
         put_del_thread = requests.put(
@@ -136,7 +192,24 @@ class ConversationThread(models.ConversationThread):
         )
         put_save.raise_for_status()
 
+    def save_messages(self, messages: list[ThreadMessage]) -> None:
+        put_batch = requests.put(
+            url=f"{API_ENDPOINT}/threads/{self.id}/messages/batch",
+            data=json.dumps(
+                {
+                    "thread": self.model_dump(mode="json", exclude={"messages"}),
+                    "messages": [m.model_dump(mode="json") for m in messages],
+                }
+            ),
+            headers=authorization_header(),
+        )
+        put_batch.raise_for_status()
+
     def message_dict(self) -> list[dict]:
-        if len(self.messages) <= 1:
-            return []
-        return [m.to_chat_dict() for m in self.messages[1:]]
+        # Only the latest page is loaded for display, but the LLM gets the whole
+        # conversation. The greeting shown on new threads is never saved, so it is the
+        # only message that can come before the first user message.
+        messages = self.get_all_messages()
+        if messages and messages[0].role == "assistant":
+            messages = messages[1:]
+        return [m.to_chat_dict() for m in messages]
@@ -28,14 +28,10 @@ def get_clean_render(key: str) -> DeltaGenerator:
 
 
 def refresh_user_conversations() -> dict:
-    user_threads = ConversationThread.get_all_for_user()
+    user_threads = ConversationThread.get_summaries_for_user()
 
     if user_threads:
-        conversations = {
-            thread_id: ConversationThread.get_from_id(thread_id=thread_id)
-            for thread_id in user_threads
-        }
-        conversations = {k: v for k, v in conversations.items() if v}
+        conversations = {thread.id: thread for thread in user_threads}
         st.session_state.conversations = conversations
     else:
         st.session_state.conversations = conversations = dict()
@@ -54,9 +50,10 @@ def set_active_conversation(thread_id: str) -> ConversationThread:
             )
         )
     else:
-        active_thread = st.session_state.current_thread = (
-            st.session_state.conversations.get(thread_id)
-        )
+        active_thread = st.session_state.conversations.get(thread_id)
+        if not active_thread:
+            active_thread = ConversationThread.get_from_id(thread_id=thread_id)
+        st.session_state.current_thread = active_thread
         if not active_thread:
             return set_active_conversation("new")
 
@@ -1,4 +1,4 @@
-docker build -t terra_jobs:latest .
+(cd "$(dirname "$0")/.." && docker build -f jobs/Dockerfile -t terra_jobs:latest .)
 
 docker run \
   --rm \
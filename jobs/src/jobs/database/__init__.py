@@ -1,6 +1,16 @@
+from shared.engine import pool_metrics
+
+from .migrations import run_migrations
 from .utils import async_cache_client
 from .utils import cache_client
 from .utils import database_session
-from .utils import init_db
+from .utils import engine
 
-__all__ = ["cache_client", "database_session", "init_db", "async_cache_client"]
+__all__ = [
+    "cache_client",
+    "database_session",
+    "engine",
+    "pool_metrics",
+    "run_migrations",
+    "async_cache_client",
+]
@@ -0,0 +1,44 @@
+from jobs.database.utils import engine
+from jobs.logger import logger
+
+from shared.migrations import Migration
+from shared.migrations import MigrationRunner
+
+__all__ = ["MIGRATIONS", "run_migrations"]
+
+NAMESPACE = "jobs"
+
+MIGRATIONS = [
+    Migration(
+        version="0001_initial",
+        statements=[
+            "CREATE SCHEMA IF NOT EXISTS news",
+        ],
+        create_all=True,
+    ),
+    Migration(
+        version="0002_news_indexes",
+        statements=[
+            """
+            CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_raw_items_unbatched_publish_date
+            ON news.raw_items (publish_date)
+            WHERE batch_id IS NULL
+            """,
+        ],
+        concurrent=True,
+    ),
+]
+
+
+def _get_metadata():
+    # Tables are declared next to their pipelines, so the modules defining them
+    # must be imported before the metadata is complete.
+    import jobs.tasks.news_scraper.models  # noqa: F401
+    from jobs.database.schemas import Base
+
+    return Base.metadata
+
+
+async def run_migrations():
+    runner = MigrationRunner(engine, NAMESPACE, MIGRATIONS, _get_metadata, logger)
+    await runner.run()
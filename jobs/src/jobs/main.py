@@ -6,10 +6,13 @@ import signal
 import sys
 
 from jobs.config import init_ell
-from jobs.database import init_db
+from jobs.database import engine
+from jobs.database import pool_metrics
+from jobs.database import run_migrations
+from jobs.logger import logger
 
 cli = argparse.ArgumentParser(description="Job Orchestrator CLI")
-cli.add_argument("job", help="Name of the job to run (e.g., news_graph).")
+cli.add_argument("job", help="Name of the job to run (e.g., news_graph), or migrate.")
 cli.add_argument(
     "--args", nargs=argparse.REMAINDER, help="Additional job-specific arguments."
 )
@@ -46,8 +49,10 @@ class JobsOrchestrator:
         pipeline = module.Pipeline()
         kwargs = parse_args(args)
 
-        await init_db()
-        await pipeline.run(**kwargs)
+        try:
+            await pipeline.run(**kwargs)
+        finally:
+            logger.info(f"Database pool report: {pool_metrics(engine)}")
 
 
 async def shutdown(signal, loop):
@@ -70,7 +75,12 @@ async def main():
             sig, lambda s=sig: asyncio.create_task(shutdown(s, loop))
         )
 
-    if len(args.job):
+    if args.job == "migrate":
+        await run_migrations()
+
+    elif len(args.job):
+        # Only pipelines need the LLM clients; migrations just need the database.
+        await asyncio.to_thread(init_ell)
         orchestrator = JobsOrchestrator()
         await orchestrator.run(args.job, args.args)
 
@@ -80,5 +90,4 @@ async def main():
 
 
 if __name__ == "__main__":
-    init_ell()
     asyncio.run(main())
@@ -0,0 +1,3 @@
+from .main import ContextCompactionPipeline as Pipeline
+
+__all__ = ["Pipeline"]
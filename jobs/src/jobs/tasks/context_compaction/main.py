@@ -0,0 +1,225 @@
+import asyncio
+import json
+from collections import Counter
+from datetime import UTC
+from datetime import datetime
+from datetime import timedelta
+
+import ell
+import numpy as np
+from fargs.utils import rate_limited_task
+from jobs.database import async_cache_client
+from jobs.tasks.base import BaseAsyncPipeline
+from jobs.tasks.context_compaction.config import COMPACT_AFTER_DAYS
+from jobs.tasks.context_compaction.config import CONTEXT_ONLY_METADATA
+from jobs.tasks.context_compaction.config import DOCSTORE_TABLE
+from jobs.tasks.context_compaction.config import MAX_CLUSTER_SIZE
+from jobs.tasks.context_compaction.config import RETENTION_DAYS
+from jobs.tasks.context_compaction.config import SEARCH_GENERATION_KEY
+from jobs.tasks.context_compaction.config import SIMILARITY_THRESHOLD
+from jobs.tasks.context_compaction.config import SUMMARY_MAX_RATE
+from jobs.tasks.context_compaction.config import SUMMARY_MODEL
+from jobs.tasks.context_compaction.config import VECTOR_STORE_PARAMS
+from jobs.tasks.context_compaction.config import VECTOR_TABLE
+from jobs.tasks.context_compaction.config import context_engine
+from jobs.tasks.context_compaction.config import embeddings
+from jobs.tasks.context_compaction.prompts import SUMMARIZE_CLUSTER_PROMPT
+from llama_index.core.schema import TextNode
+from llama_index.vector_stores.postgres import PGVectorStore
+from sqlalchemy import text
+
+CHUNK_TIMESTAMP = "(metadata_->>'timestamp')::timestamptz"
+IS_COMPACTED = "coalesce((metadata_->>'compacted')::boolean, false)"
+
+SELECT_THREADS = f"""
+SELECT metadata_->>'user_key' AS user_key, metadata_->>'thread_id' AS thread_id
+FROM {VECTOR_TABLE}
+WHERE metadata_->>'user_key' IS NOT NULL
+  AND {CHUNK_TIMESTAMP} < :cutoff
+  AND NOT {IS_COMPACTED}
+GROUP BY 1, 2
+HAVING count(*) > 1
+"""
+
+SELECT_CHUNKS = f"""
+SELECT node_id, text, embedding::text AS embedding, metadata_
+FROM {VECTOR_TABLE}
+WHERE metadata_->>'user_key' = :user_key
+  AND metadata_->>'thread_id' IS NOT DISTINCT FROM :thread_id
+  AND {CHUNK_TIMESTAMP} < :cutoff
+  AND NOT {IS_COMPACTED}
+ORDER BY {CHUNK_TIMESTAMP} ASC
+"""
+
+DELETE_EXPIRED = f"""
+DELETE FROM {VECTOR_TABLE}
+WHERE {CHUNK_TIMESTAMP} < :cutoff
+RETURNING node_id, metadata_->>'ref_doc_id' AS ref_doc_id
+"""
+
+DELETE_DOCSTORE_KEYS = f"DELETE FROM {DOCSTORE_TABLE} WHERE key = ANY(:keys)"
+
+
+def cluster_embeddings(
+    vectors: np.ndarray, threshold: float, max_size: int
+) -> list[list[int]]:
+    # Greedy single pass in time order: each chunk joins the most similar cluster
+    # whose centroid clears the threshold, or starts a new one.
+    normed = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    clusters: list[list[int]] = []
+    centroids: list[np.ndarray] = []
+
+    for i, vector in enumerate(normed):
+        if centroids:
+            scores = np.stack(centroids) @ vector
+            best = int(scores.argmax())
+            if scores[best] >= threshold and len(clusters[best]) < max_size:
+                clusters[best].append(i)
+                centroid = normed[clusters[best]].mean(axis=0)
+                centroids[best] = centroid / np.linalg.norm(centroid)
+                continue
+
+        clusters.append([i])
+        centroids.append(vector)
+
+    return [cluster for cluster in clusters if len(cluster) > 1]
+
+
+class ContextCompactionPipeline(BaseAsyncPipeline):
+    def __init__(self):
+        super().__init__(namespace="context")
+        self.vector_store = PGVectorStore.from_params(**VECTOR_STORE_PARAMS)
+        self._processed = None
+
+    @ell.simple(model=SUMMARY_MODEL)
+    def summarize(self, notes: list[str]):
+        return [
+            ell.system(SUMMARIZE_CLUSTER_PROMPT),
+            ell.user("\n\n---\n\n".join(notes)),
+        ]
+
+    async def run(
+        self,
+        compact_after_days: int = COMPACT_AFTER_DAYS,
+        retention_days: int = RETENTION_DAYS,
+    ):
+        self.log.info("Running context compaction pipeline...")
+        now = datetime.now(UTC)
+
+        try:
+            expired = await self.expire(now - timedelta(days=retention_days))
+            self.log.info(f"Deleted {expired} context chunks past retention.")
+
+            cutoff = now - timedelta(days=compact_after_days)
+            threads = await self.fetch(cutoff)
+            self.log.info(f"Found {len(threads)} threads with chunks to compact.")
+
+            compacted = 0
+            for user_key, thread_id in threads:
+                chunks = await self.fetch_chunks(user_key, thread_id, cutoff)
+                try:
+                    await self.process(chunks)
+                    compacted += await self.load()
+                except Exception as e:
+                    self.log.error(f"Error compacting thread {thread_id}: {e}")
+        finally:
+            await self.vector_store.close()
+            await context_engine.dispose()
+
+        if expired or compacted:
+            async with async_cache_client() as cache:
+                await cache.incr(SEARCH_GENERATION_KEY)
+
+        self.log.info(
+            f"Completed context compaction. Replaced {compacted} chunks with summaries."
+        )
+
+    async def expire(self, cutoff: datetime) -> int:
+        async with context_engine.begin() as conn:
+            result = await conn.execute(text(DELETE_EXPIRED), {"cutoff": cutoff})
+            rows = result.all()
+            await self.delete_docstore_keys(
+                conn, [r.node_id for r in rows] + [r.ref_doc_id for r in rows]
+            )
+        return len(rows)
+
+    async def delete_docstore_keys(self, conn, keys: list[str | None]):
+        # Docstore hashes would otherwise make re-saved content look unchanged, so
+        # it would be skipped and never indexed again.
+        keys = set(keys)
+        keys.discard(None)
+        docstore = await conn.scalar(
+            text("SELECT to_regclass(:table)"), {"table": DOCSTORE_TABLE}
+        )
+        if keys and docstore:
+            await conn.execute(text(DELETE_DOCSTORE_KEYS), {"keys": list(keys)})
+
+    async def fetch(self, cutoff: datetime) -> list[tuple[str, str | None]]:
+        async with context_engine.connect() as conn:
+            result = await conn.execute(text(SELECT_THREADS), {"cutoff": cutoff})
+            return [(r.user_key, r.thread_id) for r in result]
+
+    async def fetch_chunks(
+        self, user_key: str, thread_id: str | None, cutoff: datetime
+    ) -> list:
+        async with context_engine.connect() as conn:
+            result = await conn.execute(
+                text(SELECT_CHUNKS),
+                {"user_key": user_key, "thread_id": thread_id, "cutoff": cutoff},
+            )
+            return result.all()
+
+    async def process(self, data: list):
+        vectors = np.array([json.loads(row.embedding) for row in data])
+        clusters = cluster_embeddings(vectors, SIMILARITY_THRESHOLD, MAX_CLUSTER_SIZE)
+        self._processed = [[data[i] for i in cluster] for cluster in clusters]
+
+    async def load(self) -> int:
+        clusters = self._processed
+        if not clusters:
+            return 0
+
+        @rate_limited_task(max_rate=SUMMARY_MAX_RATE)
+        async def summarize_one(cluster):
+            return await asyncio.to_thread(
+                self.summarize, [row.text for row in cluster]
+            )
+
+        summaries = await asyncio.gather(*(summarize_one(c) for c in clusters))
+        vectors = await embeddings.aget_text_embedding_batch(summaries)
+
+        nodes = []
+        for cluster, summary, vector in zip(clusters, summaries, vectors, strict=True):
+            metadata = [row.metadata_ for row in cluster]
+            agents = Counter(m["agent"] for m in metadata)
+            nodes.append(
+                TextNode(
+                    text=summary,
+                    embedding=vector,
+                    metadata={
+                        "agent": ", ".join(agent for agent, _ in agents.most_common()),
+                        "timestamp": max(m["timestamp"] for m in metadata),
+                        "user_key": metadata[0]["user_key"],
+                        "thread_id": metadata[0].get("thread_id"),
+                        "compacted": True,
+                        "compacted_from": len(cluster),
+                    },
+                    excluded_embed_metadata_keys=CONTEXT_ONLY_METADATA,
+                    excluded_llm_metadata_keys=CONTEXT_ONLY_METADATA,
+                )
+            )
+
+        # Summaries are written before the originals are removed, so a failure in
+        # between leaves duplicates rather than losing context.
+        originals = [row for cluster in clusters for row in cluster]
+        await self.vector_store.async_add(nodes)
+        await self.vector_store.adelete_nodes(
+            node_ids=[row.node_id for row in originals]
+        )
+        async with context_engine.begin() as conn:
+            await self.delete_docstore_keys(
+                conn,
+                [row.node_id for row in originals]
+                + [row.metadata_.get("ref_doc_id") for row in originals],
+            )
+        return len(originals)
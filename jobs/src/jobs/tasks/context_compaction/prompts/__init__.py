@@ -0,0 +1,5 @@
+from .summary import SUMMARIZE_CLUSTER_PROMPT
+
+__all__ = [
+    "SUMMARIZE_CLUSTER_PROMPT",
+]
@@ -0,0 +1,9 @@
+# ruff: noqa: E501
+
+SUMMARIZE_CLUSTER_PROMPT = """
+You are an archivist consolidating notes that AI agents saved during a single conversation. The notes below overlap heavily.
+
+Write one self-contained note that keeps every distinct fact, figure, source, decision and conclusion from the notes. Remove repetition, but do not add anything that is not in the notes. Where notes disagree, keep the most recent one and say that it was revised.
+
+Respond with the consolidated note only.
+"""
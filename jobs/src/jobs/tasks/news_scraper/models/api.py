@@ -6,9 +6,11 @@ from pydantic import BaseModel
 from pydantic import model_validator
 from sqlalchemy import Column
 from sqlalchemy import Float
+from sqlalchemy import Index
 from sqlalchemy import String
 from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.dialects.postgresql import TIMESTAMP
+from sqlalchemy.sql import text
 
 from jobs.database.schemas import Base
 from jobs.tasks.utils import clean_string
@@ -16,7 +18,14 @@ from jobs.tasks.utils import clean_string
 
 class NewsItemSchema(Base):
     __tablename__ = "raw_items"
-    __table_args__ = {"schema": "news"}
+    __table_args__ = (
+        Index(
+            "ix_raw_items_unbatched_publish_date",
+            "publish_date",
+            postgresql_where=text("batch_id IS NULL"),
+        ),
+        {"schema": "news"},
+    )
 
     item_id = Column(String, primary_key=True, nullable=False)
     title = Column(String, nullable=False)
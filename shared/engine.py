@@ -0,0 +1,76 @@
+import os
+import time
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+__all__ = ["create_engine", "pool_metrics"]
+
+
+class PoolStats:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait: float):
+        self.checkouts += 1
+        self.wait_total += wait
+        self.wait_max = max(self.wait_max, wait)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    stats: PoolStats
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.stats.timeouts += 1
+            raise
+        finally:
+            self.stats.record(time.perf_counter() - start)
+
+
+def create_engine(url: str, **kwargs) -> AsyncEngine:
+    # Each engine gets its own pool subclass so that stats survive pool recreation
+    # without being shared between engines.
+    poolclass = type(
+        "InstrumentedQueuePool", (InstrumentedQueuePool,), {"stats": PoolStats()}
+    )
+    statement_cache_size = os.getenv("DB_STATEMENT_CACHE_SIZE", "100")
+
+    return create_async_engine(
+        make_url(url).update_query_dict(
+            {"prepared_statement_cache_size": statement_cache_size}
+        ),
+        poolclass=poolclass,
+        pool_size=int(os.getenv("DB_POOL_SIZE", 5)),
+        max_overflow=int(os.getenv("DB_MAX_OVERFLOW", 10)),
+        pool_timeout=int(os.getenv("DB_POOL_TIMEOUT", 30)),
+        pool_recycle=int(os.getenv("DB_POOL_RECYCLE", 1800)),
+        pool_pre_ping=True,
+        **kwargs,
+    )
+
+
+def pool_metrics(engine: AsyncEngine) -> dict:
+    pool = engine.pool
+    stats = pool.stats
+    return {
+        "size": pool.size(),
+        "checked_in": pool.checkedin(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "checkouts": stats.checkouts,
+        "timeouts": stats.timeouts,
+        "wait_avg_ms": (
+            stats.wait_total / stats.checkouts * 1000 if stats.checkouts else 0.0
+        ),
+        "wait_max_ms": stats.wait_max * 1000,
+    }
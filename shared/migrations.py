@@ -0,0 +1,127 @@
+import logging
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from dataclasses import field
+
+from sqlalchemy import MetaData
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+__all__ = ["Migration", "MigrationRunner"]
+
+CREATE_MIGRATIONS_TABLE = """
+CREATE TABLE IF NOT EXISTS public.schema_migrations (
+    namespace VARCHAR NOT NULL,
+    version VARCHAR NOT NULL,
+    applied_at TIMESTAMPTZ NOT NULL DEFAULT now(),
+    PRIMARY KEY (namespace, version)
+)
+"""
+
+SELECT_INVALID_INDEX = """
+SELECT 1
+FROM pg_index i
+JOIN pg_class c ON c.oid = i.indexrelid
+JOIN pg_namespace n ON n.oid = c.relnamespace
+WHERE n.nspname = :schema AND c.relname = :name AND NOT i.indisvalid
+"""
+
+CONCURRENT_INDEX = re.compile(
+    r"CREATE\s+(?:UNIQUE\s+)?INDEX\s+CONCURRENTLY\s+IF\s+NOT\s+EXISTS\s+(\w+)\s+"
+    r"ON\s+(?:ONLY\s+)?(\w+)\.",
+    re.IGNORECASE,
+)
+
+
+@dataclass
+class Migration:
+    version: str
+    statements: list[str] = field(default_factory=list)
+    create_all: bool = False
+    concurrent: bool = False
+
+
+class MigrationRunner:
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        namespace: str,
+        migrations: list[Migration],
+        metadata: Callable[[], MetaData],
+        logger: logging.Logger,
+    ):
+        self.engine = engine
+        self.namespace = namespace
+        self.migrations = migrations
+        self.metadata = metadata
+        self.logger = logger
+
+    async def _applied_versions(self) -> set[str]:
+        async with self.engine.begin() as conn:
+            await conn.execute(text(CREATE_MIGRATIONS_TABLE))
+            query = await conn.execute(
+                text(
+                    "SELECT version FROM public.schema_migrations WHERE namespace = :ns"
+                ),
+                {"ns": self.namespace},
+            )
+            return set(query.scalars().all())
+
+    async def _invalid_indexes(
+        self, conn: AsyncConnection, migration: Migration
+    ) -> list[str]:
+        invalid = []
+        for statement in migration.statements:
+            for name, schema in CONCURRENT_INDEX.findall(statement):
+                query = await conn.execute(
+                    text(SELECT_INVALID_INDEX), {"schema": schema, "name": name}
+                )
+                if query.scalar():
+                    invalid.append(f"{schema}.{name}")
+        return invalid
+
+    async def _apply(self, conn: AsyncConnection, migration: Migration):
+        if migration.create_all:
+            await conn.run_sync(self.metadata().create_all)
+
+        # A failed CREATE INDEX CONCURRENTLY leaves an INVALID index behind, which
+        # IF NOT EXISTS would then skip. Drop it so the build is retried.
+        if migration.concurrent:
+            for index in await self._invalid_indexes(conn, migration):
+                self.logger.warning(f"Dropping invalid index {index} before retrying.")
+                await conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {index}"))
+
+        for statement in migration.statements:
+            await conn.execute(text(statement))
+
+        if migration.concurrent:
+            invalid = await self._invalid_indexes(conn, migration)
+            if invalid:
+                raise RuntimeError(f"Index build left invalid indexes: {invalid}")
+
+        await conn.execute(
+            text(
+                "INSERT INTO public.schema_migrations (namespace, version) "
+                "VALUES (:ns, :version)"
+            ),
+            {"ns": self.namespace, "version": migration.version},
+        )
+
+    async def run(self):
+        applied = await self._applied_versions()
+
+        for migration in self.migrations:
+            if migration.version in applied:
+                continue
+
+            self.logger.info(f"Applying migration {self.namespace}:{migration.version}")
+            if migration.concurrent:
+                # CREATE INDEX CONCURRENTLY cannot run inside a transaction block.
+                async with self.engine.connect() as conn:
+                    conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                    await self._apply(conn, migration)
+            else:
+                async with self.engine.begin() as conn:
+                    await self._apply(conn, migration)